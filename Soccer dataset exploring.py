@@ -4,7 +4,7 @@
 # ## Introduction
 # 
 # > In this project I'll explore "Soccer Database", which contains differnt tables with data about top european leagues teams, matches and player, in the period of season 2008/2009 to season 2015/2016.
-# The dataset was provided in SQLite format and have been checked in DB browser, and later on imported and extracted into python by "sqlalchemy" library.
+# The dataset was provided in SQLite format and have been checked in DB browser, and later on extracted into python with the "soccer.store" module, which caches every table as Parquet.
 # 
 
 # #### By the end of the project the following questions should be answered : 
@@ -41,74 +41,20 @@ import pandas as pd
 import numpy as np
 import matplotlib.pyplot as plt
 import seaborn as sns
-from sqlalchemy import create_engine
+from soccer import venues
+from soccer.store import build_cache, load_table
+from soccer.topk import both_ends, top_k
 from IPython.display import Image
 get_ipython().run_line_magic('matplotlib', 'inline')
 
 
-# #### Extract tables from 'sqlite' dataframe
-# #### Then saving extracted tables into differnt CSV table to use later
+# #### Extract tables from 'sqlite' database into a columnar cache (one Parquet file per table)
+# #### The cache is only rebuilt when 'database.sqlite' changes, and each analysis reads just the columns it needs
 
 # In[2]:
 
 
-engine = create_engine('sqlite:///database.sqlite')
-engine.table_names()
-
-
-# In[3]:
-
-
-conn = engine.connect()
-
-
-# In[4]:
-
-
-country = pd.read_sql_query('SELECT * FROM Country', engine)
-country.to_csv('country.csv', index=False)
-
-
-# In[5]:
-
-
-league = pd.read_sql_query('SELECT * FROM League', engine)
-league.to_csv('league.csv', index=False)
-
-
-# In[6]:
-
-
-match = pd.read_sql_query('SELECT * FROM Match', engine)
-match.to_csv('match.csv', index=False)
-
-
-# In[7]:
-
-
-player = pd.read_sql_query('SELECT * FROM Player', engine)
-player.to_csv('player.csv', index=False)
-
-
-# In[8]:
-
-
-player_attributes = pd.read_sql_query('SELECT * FROM Player_Attributes', engine)
-player_attributes.to_csv('player_attributes.csv', index=False)
-
-
-# In[9]:
-
-
-team = pd.read_sql_query('SELECT * FROM Team', engine)
-team.to_csv('team.csv', index=False)
-
-
-# In[10]:
-
-
-team_attributes = pd.read_sql_query('SELECT * FROM Team_Attributes', engine)
-team_attributes.to_csv('team_attributes.csv', index=False)
+build_cache()
 
 
 #  
@@ -124,7 +70,7 @@ team_attributes.to_csv('team_attributes.csv', index=False)
 # In[11]:
 
 
-player = pd.read_csv('player.csv')
+player = load_table('Player')
 player.head()
 
 
@@ -155,19 +101,17 @@ df_player.head()
 # In[15]:
 
 
-oldest_player = df_player.sort_values(by = 'birthday').head(10)
+oldest_player, youngest_player = both_ends(df_player, 'birthday', 10)
 oldest_player.drop(['id','player_api_id','weight', 'height'], axis = 1, inplace = True)
 oldest_player.to_csv('oldest_player.csv', index=False)
 
-youngest_player = df_player.sort_values(by = 'birthday', ascending = False).head(10)
 youngest_player.drop(['id','player_api_id','weight', 'height'], axis = 1, inplace = True)
 youngest_player.to_csv('youngest_player.csv', index=False)
 
-shortest_player = df_player.sort_values(by = 'height').head(10)
+shortest_player, tallest_player = both_ends(df_player, 'height', 10)
 shortest_player.drop(['id','player_api_id','weight', 'birthday'], axis = 1, inplace = True)
 shortest_player.to_csv('shortest_player.csv', index=False)
 
-tallest_player = df_player.sort_values(by = 'height', ascending = False).head(10)
 tallest_player.drop(['id','player_api_id','weight', 'birthday'], axis = 1, inplace = True)
 tallest_player.to_csv('tallest_player.csv', index=False)
 
@@ -226,7 +170,7 @@ tallest_player
 # In[20]:
 
 
-player_attributes = pd.read_csv('player_attributes.csv')
+player_attributes = load_table('Player_Attributes')
 player_attributes.head()
 
 
@@ -273,7 +217,7 @@ player_attributes_1
 
 
 player_attributes_1.drop('player_api_id', axis = 1, inplace = True)
-player_attributes_1 = round(player_attributes_1.groupby('player_name').mean('overall_rating'), 2)
+player_attributes_1 = round(player_attributes_1.groupby('player_name', observed = True).mean('overall_rating'), 2)
 player_attributes_1
 
 
@@ -282,10 +226,10 @@ player_attributes_1
 # In[27]:
 
 
-top_players = player_attributes_1.sort_values(by = 'overall_rating', ascending = False). head(10)
+top_players = top_k(player_attributes_1, 'overall_rating', 10)
 top_players.to_csv('top_players.csv')
 
-top_players_potential = player_attributes_1.sort_values(by = 'potential', ascending = False). head(10)
+top_players_potential = top_k(player_attributes_1, 'potential', 10)
 top_players.to_csv('top_players.csv')
 
 
@@ -320,7 +264,12 @@ top_players_potential
 # In[30]:
 
 
-match = pd.read_csv('match.csv')
+match = load_table('Match', columns=['home_player_1', 'home_player_2', 'home_player_3',
+       'home_player_4', 'home_player_5', 'home_player_6', 'home_player_7',
+       'home_player_8', 'home_player_9', 'home_player_10', 'home_player_11',
+       'away_player_1', 'away_player_2', 'away_player_3', 'away_player_4',
+       'away_player_5', 'away_player_6', 'away_player_7', 'away_player_8',
+       'away_player_9', 'away_player_10', 'away_player_11'])
 match.head()
 
 
@@ -380,10 +329,10 @@ appearance
 # In[38]:
 
 
-appearance = appearance.groupby('player_name').count().sort_values(by = 'player_api_id',ascending = False)
+appearance = appearance.groupby('player_name', observed = True).count()
 appearance.drop('player_id', axis = 1,inplace = True)
 appearance.rename(columns = {'player_api_id':'apperances'}, inplace = True)
-appearance = appearance.head(10)
+appearance = top_k(appearance, 'apperances', 10)
 appearance.to_csv('player_most_appearances.csv')
 
 
@@ -416,7 +365,7 @@ appearance
 # In[40]:
 
 
-match = pd.read_csv('match.csv')
+match = load_table('Match', columns=['league_id','season', 'home_team_api_id', 'away_team_api_id','home_team_goal', 'away_team_goal'])
 match.head()
 
 
@@ -438,7 +387,7 @@ goal.info()
 # In[43]:
 
 
-team = pd.read_csv('team.csv')
+team = load_table('Team')
 team.head()
 
 
@@ -499,7 +448,7 @@ goal_home_away.head()
 # In[51]:
 
 
-league = pd.read_csv('league.csv')
+league = load_table('League')
 league.head()
 
 
@@ -541,8 +490,10 @@ team_season_goals = goal_home_away_league.copy()
 # In[57]:
 
 
-home_goals = team_season_goals[['season','league_name', 'home_team', 'home_team_goal']].groupby(['season','league_name','home_team'], as_index = False)['home_team_goal'].sum().sort_values(by = 'home_team_goal',ascending = False)
-away_goals = team_season_goals[['season','league_name', 'away_team', 'away_team_goal']].groupby(['season','league_name','away_team'], as_index = False)['away_team_goal'].sum().sort_values(by = 'away_team_goal',ascending = False)
+home_goals = team_season_goals[['season','league_name', 'home_team', 'home_team_goal']].groupby(['season','league_name','home_team'], as_index = False, observed = True)['home_team_goal'].sum()
+home_goals = top_k(home_goals, 'home_team_goal', len(home_goals))
+away_goals = team_season_goals[['season','league_name', 'away_team', 'away_team_goal']].groupby(['season','league_name','away_team'], as_index = False, observed = True)['away_team_goal'].sum()
+away_goals = top_k(away_goals, 'away_team_goal', len(away_goals))
 
 
 # In[58]:
@@ -558,7 +509,7 @@ team_season_goals.head()
 team_season_goals.rename(columns = {'league_name_x':'league_name', 'home_team':'team'}, inplace = True)
 team_season_goals['goals'] = team_season_goals['home_team_goal'] + team_season_goals['away_team_goal']
 team_season_goals.drop(['league_name_y','away_team','home_team_goal','away_team_goal'],axis = 1, inplace = True)
-team_season_goals = team_season_goals.sort_values(by = 'goals', ascending = False)
+team_season_goals = top_k(team_season_goals, 'goals', len(team_season_goals))
 
 
 # > Merge teams goals after calulating the home and away goals for each club for each season and droping repeated coulmns and rename columns for better readability and finally sort the table by number of goals in descending manner.
@@ -610,7 +561,8 @@ team_season_goals.to_csv('team_season_goals.csv')
 # In[63]:
 
 
-team_goals = team_season_goals.groupby('team', as_index = False).sum('goals').sort_values(by = 'goals', ascending = False)
+team_goals = team_season_goals.groupby('team', as_index = False, observed = True).sum('goals')
+team_goals = top_k(team_goals, 'goals', len(team_goals))
 
 
 # <a id= 'team_goals'></a>
@@ -638,7 +590,8 @@ plt_attr('Teams','Teams with most goals');
 # In[66]:
 
 
-season_goals = team_season_goals.groupby('season', as_index = False).sum('goals').sort_values(by = 'goals', ascending = False)
+season_goals = team_season_goals.groupby('season', as_index = False, observed = True).sum('goals')
+season_goals = top_k(season_goals, 'goals', len(season_goals))
 
 
 # <a id= 'season_goals'></a>
@@ -672,7 +625,8 @@ season_goals.to_csv('season_goals.csv')
 # In[70]:
 
 
-league_goals = team_season_goals.groupby('league_name', as_index = False).sum('goals').sort_values(by = 'goals', ascending = False)
+league_goals = team_season_goals.groupby('league_name', as_index = False, observed = True).sum('goals')
+league_goals = top_k(league_goals, 'goals', len(league_goals))
 
 
 # <a id= 'league_goals'></a>
@@ -741,7 +695,7 @@ team_improve.info()
 
 team_improve = team_improve.dropna()
 team_improve['differnce'] = team_improve['2015/2016'] - team_improve['2008/2009']
-team_improve = team_improve.sort_values(by = 'differnce', ascending = False).head(8)
+team_improve = top_k(team_improve, 'differnce', 8)
 
 
 # >To find team improvement progress we converted team goals table into wide table with seasons as coulmns and teams as rows and checked the data types and turns out to be floats number and goals don't need to be float, so I converted all the columns into ints datatype, and some rows has na result for some seasons which could means that team has been relegated into lower tier league in that year so I choose to drop all clubs with na values to maintain data integrity, and then we calculated how much each team scored in first and last season and find the difference between them.
@@ -792,7 +746,7 @@ best_teams.head()
 # In[85]:
 
 
-best_teams = best_teams.groupby('winner', as_index = False).count().sort_values(by='league_name', ascending = False)
+best_teams = best_teams.groupby('winner', as_index = False).count()
 best_teams
 
 
@@ -801,7 +755,7 @@ best_teams
 
 best_teams.drop(['season','home_team','away_team','home_team_goal','away_team_goal'], inplace = True, axis = 1)
 best_teams.rename(columns = {'winner':'team', 'league_name':'wins'}, inplace = True)
-best_teams = best_teams.head(10)
+best_teams = top_k(best_teams, 'wins', 10)
 
 
 # <a id= 'best_teams'></a>
@@ -834,7 +788,7 @@ best_teams
 # In[90]:
 
 
-team_attributes = pd.read_csv('team_attributes.csv')
+team_attributes = load_table('Team_Attributes')
 team_attributes.head()
 
 
@@ -942,7 +896,7 @@ win_home_away.head()
 # In[103]:
 
 
-win_home_away = win_home_away.groupby(['league_name', 'winner'], as_index = False).count()
+win_home_away = win_home_away.groupby(['league_name', 'winner'], as_index = False, observed = True).count()
 
 
 # In[104]:
@@ -1025,38 +979,17 @@ plt.title('Home-away win ratio in Scotland Premier League', fontsize=24);
 # In[113]:
 
 
-win_home_away_teams.drop(['league_id', 'home_team_api_id', 'away_team_api_id', 'country_id','home_team_goal','away_team_goal'],axis = 1, inplace = True)
-win_home_away_teams.head(20)
+venue = venues.venue_records()
+venue.head(20)
 
 
-# In[114]:
-
-
-win_home_away_teams = win_home_away_teams[win_home_away_teams.winner != 'Draw']
-win_home_away_teams.head()
-
+# > Home and away wins, draws and points per game for every team, league and season, from one pass over both sides of each match
 
-# In[115]:
-
-
-win_home_away_teams = win_home_away_teams.groupby(['home_team', 'winner'], as_index = False).count()
-win_home_away_teams
-
-
-# In[116]:
-
-
-win_home_away_teams.drop(['away_team', 'league_name'], axis = 1, inplace = True)
-win_home_away_teams.rename(columns = {'winner':'win_as','season':'wins'}, inplace = True)
-win_home_away_teams
-
-
-# In[117]:
+# In[114]:
 
 
-away_wins = win_home_away_teams[win_home_away_teams['win_as'] == 'away_team'].sort_values(by = 'wins', ascending = False)
-away_wins.drop('win_as', inplace = True, axis = 1)
-away_wins.rename(columns = {'wins':'away_wins'},inplace = True)
+away_wins = venues.away_wins()
+home_wins = venues.home_wins()
 
 
 # <a id= 'away_wins'></a>
@@ -1075,7 +1008,7 @@ away_wins.head(20)
 # In[132]:
 
 
-away_wins.head(20).plot(x = 'home_team', y = 'away_wins', figsize = (14,8),width = 0.75, kind='bar', color = '#A7F432')
+away_wins.head(20).plot(x = 'team', y = 'away_wins', figsize = (14,8),width = 0.75, kind='bar', color = '#A7F432')
 plt_attr('Teams','Teams with most away wins')
 
 
@@ -1087,14 +1020,6 @@ plt_attr('Teams','Teams with most away wins')
 away_wins.to_csv('away_wins.csv')
 
 
-# In[121]:
-
-
-home_wins = win_home_away_teams[win_home_away_teams['win_as'] == 'home_team'].sort_values(by = 'wins', ascending = False)
-home_wins.drop('win_as', inplace = True, axis = 1)
-home_wins.rename(columns = {'wins':'home_wins'},inplace = True)
-
-
 # <a id= 'home_wins'></a>
 # 
 # # Teams with the most home wins
@@ -1111,7 +1036,7 @@ home_wins.head(20)
 # In[133]:
 
 
-home_wins.head(20).plot(x = 'home_team', y = 'home_wins', figsize = (14,8),width = 0.75, kind='bar', color = '#A7F432')
+home_wins.head(20).plot(x = 'team', y = 'home_wins', figsize = (14,8),width = 0.75, kind='bar', color = '#A7F432')
 plt_attr('Teams','Teams with most home wins')
 
 
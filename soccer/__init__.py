@@ -0,0 +1 @@
+"""Reusable pieces of the Soccer dataset exploring notebook."""
@@ -0,0 +1,5 @@
+import sys
+
+from soccer.cli import main
+
+sys.exit(main())
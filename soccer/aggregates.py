@@ -0,0 +1,155 @@
+"""Incrementally maintained season aggregates.
+
+``AggregateStore`` keeps the small per-(season, league, team) tables behind
+``team_season_goals``, ``win_home_away`` and ``best_teams``. New Match rows
+are folded in as deltas (already ingested match IDs are skipped), so adding
+a season only reads that season's matches; the rankings are then computed
+from the aggregates alone.
+"""
+import os
+
+import numpy as np
+import pandas as pd
+
+from soccer.analysis import RESULTS, result_codes, with_team_names
+from soccer.query import GOAL_COLUMNS, read_match
+from soccer.store import CACHE_DIR, DATABASE, load_table
+from soccer.topk import top_k
+
+TEAM_KEYS = ['season', 'league_id', 'team_api_id']
+RESULT_KEYS = ['season', 'league_id', 'result']
+
+TABLES = {
+    'team_goals': TEAM_KEYS + ['goals'],
+    'team_wins': TEAM_KEYS + ['wins'],
+    'results': RESULT_KEYS + ['total'],
+}
+
+
+def _empty(columns):
+    return pd.DataFrame({column: pd.Series(dtype='str' if column in ('season', 'result') else 'int64')
+                         for column in columns})
+
+
+def _add(total, delta, keys):
+    """Sum ``delta`` into ``total`` on ``keys``; both are small aggregates."""
+    if total.empty:
+        combined = delta
+    else:
+        combined = pd.concat([total, delta], ignore_index=True)
+    return combined.groupby(keys, as_index=False, sort=True).sum()
+
+
+def match_deltas(matches):
+    """Aggregate a batch of matches into the three store tables."""
+    matches = matches.assign(season=matches['season'].astype(str))
+    home_goal = matches['home_team_goal'].to_numpy()
+    away_goal = matches['away_team_goal'].to_numpy()
+
+    sides = []
+    for side, goals, won in (('home', home_goal, home_goal > away_goal),
+                             ('away', away_goal, away_goal > home_goal)):
+        sides.append(pd.DataFrame({'season': matches['season'].to_numpy(),
+                                   'league_id': matches['league_id'].to_numpy(),
+                                   'team_api_id': matches[side + '_team_api_id'].to_numpy(),
+                                   'goals': goals,
+                                   'wins': won.astype('int64')}))
+    stacked = pd.concat(sides, ignore_index=True)
+    grouped = stacked.groupby(TEAM_KEYS, as_index=False, sort=False)
+
+    results = pd.DataFrame({'season': matches['season'].to_numpy(),
+                            'league_id': matches['league_id'].to_numpy(),
+                            'result': np.asarray(RESULTS)[result_codes(home_goal, away_goal)]})
+    return {
+        'team_goals': grouped['goals'].sum(),
+        'team_wins': grouped['wins'].sum(),
+        'results': results.groupby(RESULT_KEYS, as_index=False, sort=False).size().rename(columns={'size': 'total'}),
+    }
+
+
+class AggregateStore:
+    """Per-season aggregates persisted as Parquet under ``path``."""
+
+    def __init__(self, path=os.path.join(CACHE_DIR, 'aggregates')):
+        self.path = path
+        self.match_ids = np.empty(0, dtype='int64')
+        self.tables = {name: _empty(columns) for name, columns in TABLES.items()}
+
+    @classmethod
+    def load(cls, path=os.path.join(CACHE_DIR, 'aggregates')):
+        """Open the store at ``path``; a missing store starts out empty."""
+        store = cls(path)
+        ids_path = os.path.join(path, 'match_ids.parquet')
+        if os.path.exists(ids_path):
+            store.match_ids = pd.read_parquet(ids_path)['id'].to_numpy()
+            for name in TABLES:
+                store.tables[name] = pd.read_parquet(os.path.join(path, name + '.parquet'))
+        return store
+
+    def save(self):
+        os.makedirs(self.path, exist_ok=True)
+        frames = dict(self.tables, match_ids=pd.DataFrame({'id': self.match_ids}))
+        # match_ids last: its presence marks a complete store for load()
+        for name in list(TABLES) + ['match_ids']:
+            target = os.path.join(self.path, name + '.parquet')
+            frames[name].to_parquet(target + '.tmp', index=False)
+            os.replace(target + '.tmp', target)
+
+    def ingest(self, matches):
+        """Fold new Match rows (``id`` + goal columns) into the aggregates.
+
+        Rows whose ``id`` was already ingested are ignored. Returns the
+        number of matches added.
+        """
+        matches = matches.drop_duplicates('id')
+        matches = matches[~np.isin(matches['id'].to_numpy(), self.match_ids)]
+        if matches.empty:
+            return 0
+        for name, delta in match_deltas(matches).items():
+            keys = TEAM_KEYS if name != 'results' else RESULT_KEYS
+            self.tables[name] = _add(self.tables[name], delta, keys)
+        self.match_ids = np.union1d(self.match_ids, matches['id'].to_numpy())
+        return len(matches)
+
+    def ingest_database(self, database=DATABASE, seasons=None, leagues=None, chunksize=50000):
+        """Stream matches for ``seasons``/``leagues`` from SQLite into the store."""
+        added = 0
+        for chunk in read_match(['id'] + GOAL_COLUMNS, seasons, leagues, database, chunksize):
+            added += self.ingest(chunk)
+        return added
+
+    def team_season_goals(self, team_names=None, league_names=None):
+        """Same shape as ``analysis.team_season_goals``, from the aggregates."""
+        team_names, league_names = _lookups(team_names, league_names)
+        goals = self.tables['team_goals']
+        frame = pd.DataFrame({'season': pd.Categorical(goals['season'], ordered=True),
+                              'league_name': goals['league_id'].map(league_names),
+                              'team_api_id': goals['team_api_id'],
+                              'goals': goals['goals']})
+        return with_team_names(top_k(frame, 'goals', len(frame)).reset_index(drop=True), team_names)
+
+    def wins(self, team_names=None):
+        """Same shape as ``analysis.wins``, from the aggregates."""
+        team_names, _ = _lookups(team_names, pd.Series(dtype='str'))
+        totals = self.tables['team_wins'].groupby('team_api_id', as_index=False)['wins'].sum()
+        totals = totals[totals['wins'] > 0]
+        return with_team_names(top_k(totals, 'wins', len(totals)).reset_index(drop=True), team_names)
+
+    def win_home_away(self, league_names=None):
+        """Same shape as ``analysis.win_home_away``, from the aggregates."""
+        _, league_names = _lookups(pd.Series(dtype='str'), league_names)
+        results = self.tables['results']
+        totals = results.groupby(['league_id', 'result'], as_index=False)['total'].sum()
+        return pd.DataFrame({'league_name': totals['league_id'].map(league_names),
+                             'winner': pd.Categorical(totals['result'], categories=RESULTS),
+                             'total': totals['total']}).sort_values(['league_name', 'winner'], ignore_index=True)
+
+
+def _lookups(team_names, league_names):
+    if team_names is None:
+        team = load_table('Team', ['team_api_id', 'team_long_name'])
+        team_names = team.set_index('team_api_id')['team_long_name']
+    if league_names is None:
+        league = load_table('League', ['id', 'name'])
+        league_names = league.set_index('id')['name']
+    return team_names, league_names
@@ -0,0 +1,242 @@
+"""The notebook questions as functions over shared, lazily built tables.
+
+``match_facts()`` is the one canonical match-level frame: integer IDs plus
+categorical league/season columns. Every team question is a groupby over it
+(or over ``team_season_goals``) keyed on ``team_api_id``, so nothing is
+re-merged or copied per question and two teams sharing a name stay apart.
+Team names come from the ``team_names()`` index and are attached only to
+the rows a question returns; player questions key on ``player_api_id`` the
+same way and take their names from ``player_names()``.
+"""
+import functools
+
+import numpy as np
+import pandas as pd
+
+from soccer.appearances import count_appearances, top_appearances
+from soccer.asof import team_attributes_asof
+from soccer.query import GOAL_COLUMNS, LINEUP_COLUMNS
+from soccer.ratings import rating_summary
+from soccer.store import CACHE_DIR, DATABASE, load_table
+from soccer.topk import both_ends, top_k
+
+RESULTS = ['home_team', 'away_team', 'Draw']
+
+TEAM_ATTRIBUTES = ['buildUpPlaySpeed', 'buildUpPlayDribbling', 'buildUpPlayPassing',
+                   'chanceCreationPassing', 'chanceCreationCrossing', 'chanceCreationShooting',
+                   'defencePressure', 'defenceAggression', 'defenceTeamWidth']
+
+
+def _names(ids, lookup):
+    """Categorical of ``lookup`` names for integer ``ids``, sharing its categories."""
+    lookup = lookup.astype('category')
+    return pd.Categorical(ids.map(lookup), categories=lookup.cat.categories)
+
+
+def result_codes(home_goals, away_goals):
+    """Index into ``RESULTS`` of each match: 0 home win, 1 away win, 2 draw."""
+    home_goals = np.asarray(home_goals)
+    away_goals = np.asarray(away_goals)
+    return np.select([home_goals > away_goals, home_goals < away_goals], [0, 1], default=2)
+
+
+@functools.lru_cache(maxsize=None)
+def match_facts(database=DATABASE, cache_dir=CACHE_DIR):
+    """One row per match with IDs, categorical league and season, goals and result."""
+    facts = load_table('Match', ['id', 'date', 'stage'] + GOAL_COLUMNS, database, cache_dir)
+    facts = facts.rename(columns={'id': 'match_id'})
+    league = load_table('League', ['id', 'name'], database, cache_dir)
+    league_names = league.set_index('id')['name']
+
+    facts['season'] = pd.Categorical(facts['season'], ordered=True)
+    facts['league_name'] = _names(facts['league_id'], league_names)
+    result = result_codes(facts['home_team_goal'], facts['away_team_goal'])
+    facts['result'] = pd.Categorical.from_codes(result, categories=RESULTS)
+    return facts
+
+
+@functools.lru_cache(maxsize=None)
+def players(database=DATABASE, cache_dir=CACHE_DIR):
+    return load_table('Player', ['player_api_id', 'player_name', 'birthday', 'height'], database, cache_dir)
+
+
+def player_names(frame=None):
+    """``player_name`` indexed by ``player_api_id``."""
+    frame = players() if frame is None else frame
+    return frame.set_index('player_api_id')['player_name']
+
+
+@functools.lru_cache(maxsize=None)
+def team_names(database=DATABASE, cache_dir=CACHE_DIR):
+    """``team_long_name`` indexed by ``team_api_id``."""
+    team = load_table('Team', ['team_api_id', 'team_long_name'], database, cache_dir)
+    return team.set_index('team_api_id')['team_long_name']
+
+
+def with_team_names(frame, names=None):
+    """``frame`` with a ``team`` column, looked up in ``names``, after its ``team_api_id``."""
+    names = team_names() if names is None else names
+    frame.insert(frame.columns.get_loc('team_api_id') + 1, 'team', frame['team_api_id'].map(names))
+    return frame
+
+
+def _side(facts, side, columns):
+    """One team's perspective of every match, with ``team_*`` column names."""
+    prefix = side + '_'
+    frame = facts[['season', 'league_name'] + [prefix + c for c in columns]]
+    return frame.rename(columns={prefix + c: c for c in columns})
+
+
+def team_matches(facts=None):
+    """Home and away rows of every match stacked: one row per team per match."""
+    facts = match_facts() if facts is None else facts
+    columns = ['team_api_id', 'team_goal']
+    return pd.concat([_side(facts, 'home', columns), _side(facts, 'away', columns)], ignore_index=True)
+
+
+def _rank(frame, column, n=None):
+    """``frame`` ordered by descending ``column``: all rows, or the top ``n``."""
+    ranked = top_k(frame, column, len(frame) if n is None else n)
+    return ranked.reset_index(drop=True)
+
+
+def team_season_goals(facts=None, n=None, names=None):
+    """Goals per team, league and season, most goals first."""
+    stacked = team_matches(facts)
+    goals = stacked.groupby(['season', 'league_name', 'team_api_id'], observed=True, dropna=False,
+                            as_index=False)['team_goal'].sum()
+    return with_team_names(_rank(goals.rename(columns={'team_goal': 'goals'}), 'goals', n), names)
+
+
+def _goals_by(key, season_goals, n):
+    season_goals = team_season_goals() if season_goals is None else season_goals
+    totals = season_goals.groupby(key, observed=True, dropna=False, as_index=False)['goals'].sum()
+    return _rank(totals, 'goals', n)
+
+
+def team_goals(season_goals=None, n=None, names=None):
+    return with_team_names(_goals_by('team_api_id', season_goals, n), names)
+
+
+def season_goals(season_goals=None, n=None):
+    return _goals_by('season', season_goals, n)
+
+
+def league_goals(season_goals=None, n=None):
+    return _goals_by('league_name', season_goals, n)
+
+
+def team_improve(first='2008/2009', last='2015/2016', n=8, season_goals=None, names=None):
+    """Teams with the biggest goal increase between two seasons they both played."""
+    season_goals = team_season_goals() if season_goals is None else season_goals
+    wide = season_goals.pivot_table(index=['league_name', 'team_api_id'], columns='season', values='goals',
+                                    observed=True, aggfunc='sum').astype('Int32')
+    wide.columns = wide.columns.astype(str)
+    wide = wide.dropna()
+    wide['differnce'] = wide[last] - wide[first]
+    return with_team_names(top_k(wide, 'differnce', n).reset_index(), names)
+
+
+def wins(facts=None, n=None, names=None):
+    """Number of wins per team (all venues), most wins first."""
+    facts = match_facts() if facts is None else facts
+    winners = pd.concat([facts.loc[facts['result'] == 'home_team', 'home_team_api_id'],
+                         facts.loc[facts['result'] == 'away_team', 'away_team_api_id']], ignore_index=True)
+    counts = winners.rename('team_api_id').to_frame().groupby('team_api_id', as_index=False).size()
+    return with_team_names(_rank(counts.rename(columns={'size': 'wins'}), 'wins', n), names)
+
+
+def best_teams(n=10, facts=None, names=None):
+    return wins(facts, n, names)
+
+
+def team_attributes(database=DATABASE, cache_dir=CACHE_DIR):
+    """Average numeric attributes per team over all snapshots."""
+    attributes = load_table('Team_Attributes', ['team_api_id'] + TEAM_ATTRIBUTES, database, cache_dir)
+    return attributes.groupby('team_api_id').mean().round(2)
+
+
+def best_teams_attr(n=10, facts=None, attributes=None, names=None):
+    attributes = team_attributes() if attributes is None else attributes
+    return best_teams(n, facts, names).join(attributes, on='team_api_id')
+
+
+def team_attributes_at_matches(facts=None, database=DATABASE, cache_dir=CACHE_DIR):
+    """Home and away team attributes as of each match date."""
+    facts = match_facts() if facts is None else facts
+    attributes = load_table('Team_Attributes', ['team_api_id', 'date'] + TEAM_ATTRIBUTES, database, cache_dir)
+    return team_attributes_asof(facts, attributes, TEAM_ATTRIBUTES)
+
+
+def winning_team_attributes(facts=None, at_match=None):
+    """How often the side with the higher attribute at match time won.
+
+    Only decided matches where both sides have a (different) value count.
+    """
+    facts = match_facts() if facts is None else facts
+    at_match = team_attributes_at_matches(facts) if at_match is None else at_match
+    home = at_match[['home_' + c for c in TEAM_ATTRIBUTES]].to_numpy()
+    away = at_match[['away_' + c for c in TEAM_ATTRIBUTES]].to_numpy()
+    difference = home - away
+    result = facts['result'].to_numpy()
+    usable = (result != 'Draw')[:, None] & ~np.isnan(difference) & (difference != 0)
+    higher_won = (difference > 0) == (result == 'home_team')[:, None]
+    matches = usable.sum(axis=0)
+    share = (higher_won & usable).sum(axis=0) / np.maximum(matches, 1)
+    frame = pd.DataFrame({'attribute': TEAM_ATTRIBUTES, 'matches': matches, 'higher_won': share.round(4)})
+    return _rank(frame, 'higher_won')
+
+
+def win_home_away(facts=None):
+    """Home wins, away wins and draws per league."""
+    facts = match_facts() if facts is None else facts
+    totals = facts.groupby(['league_name', 'result'], observed=True, dropna=False, as_index=False).size()
+    return totals.rename(columns={'result': 'winner', 'size': 'total'})
+
+
+def oldest_and_youngest_players(n=10, frame=None):
+    """``(oldest, youngest)`` players from a single pass over ``frame``."""
+    frame = players() if frame is None else frame
+    return both_ends(frame[['player_name', 'birthday']], 'birthday', n)
+
+
+def shortest_and_tallest_players(n=10, frame=None):
+    """``(shortest, tallest)`` players from a single pass over ``frame``."""
+    frame = players() if frame is None else frame
+    return both_ends(frame[['player_name', 'height']], 'height', n)
+
+
+def player_ratings(database=DATABASE, cache_dir=CACHE_DIR):
+    """Average overall and potential rating per ``player_api_id``."""
+    summary = rating_summary(database, cache_dir)
+    ratings = summary[['overall_rating_mean', 'potential_mean']].round(2)
+    return ratings.set_axis(['overall_rating', 'potential'], axis=1)
+
+
+def _top_rated(column, n, ratings, names):
+    ratings = player_ratings() if ratings is None else ratings
+    names = player_names() if names is None else names
+    top = top_k(ratings, column, n)
+    top.insert(0, 'player_name', top.index.map(names))
+    return top
+
+
+def top_players(n=10, ratings=None, names=None):
+    return _top_rated('overall_rating', n, ratings, names)
+
+
+def top_players_potential(n=10, ratings=None, names=None):
+    return _top_rated('potential', n, ratings, names)
+
+
+def lineups(database=DATABASE, cache_dir=CACHE_DIR):
+    columns = ['season', 'home_team_api_id', 'away_team_api_id'] + LINEUP_COLUMNS
+    return load_table('Match', columns, database, cache_dir)
+
+
+def appearances(n=10, by=None, frame=None, names=None):
+    """Players with most appearances (optionally per season or team)."""
+    frame = lineups() if frame is None else frame
+    names = player_names() if names is None else names
+    counts = count_appearances(frame, by)
+    return top_appearances(counts, n, names, by)
@@ -0,0 +1,83 @@
+"""Player appearance counts straight from the 22 lineup columns.
+
+The lineup block of Match is read as one float array (missing players are
+NaN) and counted with ``np.unique`` over the non-null cells, optionally
+keyed by season and/or the team the player lined up for. Names are attached
+only to the rows that are finally returned, and the long one-row-per-
+appearance table is never built.
+"""
+import numpy as np
+import pandas as pd
+
+from soccer.query import LINEUP_COLUMNS
+from soccer.topk import top_k
+
+HOME_SLOTS = len(LINEUP_COLUMNS) // 2
+
+BREAKDOWNS = ['season', 'team_api_id']
+
+
+def _factorize(values):
+    if isinstance(values.dtype, pd.CategoricalDtype):
+        return values.cat.codes.to_numpy(), values.cat.categories
+    return pd.factorize(values.to_numpy(), sort=True)
+
+
+def count_appearances(lineups, by=None):
+    """Count appearances per ``player_api_id``, optionally broken down ``by``.
+
+    ``lineups`` holds the 22 lineup columns, plus ``season`` and/or
+    ``home_team_api_id``/``away_team_api_id`` for the ``'season'`` and
+    ``'team_api_id'`` breakdowns. Every breakdown comes from the same
+    pass over the lineup block; only non-zero counts are returned.
+    """
+    by = [] if by is None else [by] if isinstance(by, str) else list(by)
+    unknown = [key for key in by if key not in BREAKDOWNS]
+    if unknown:
+        raise KeyError('unknown breakdown: {}'.format(unknown))
+
+    block = lineups[LINEUP_COLUMNS].to_numpy(dtype='float64')
+    rows, slots = np.nonzero(~np.isnan(block))
+    player_ids, player_codes = np.unique(block[rows, slots].astype('int64'), return_inverse=True)
+
+    codes = [player_codes]
+    labels = [player_ids]
+    for key in by:
+        if key == 'season':
+            season_codes, seasons = _factorize(lineups['season'])
+            codes.append(season_codes[rows])
+            labels.append(seasons)
+        else:
+            home = lineups['home_team_api_id'].to_numpy()
+            away = lineups['away_team_api_id'].to_numpy()
+            team_ids, team_codes = np.unique(np.where(slots < HOME_SLOTS, home[rows], away[rows]),
+                                             return_inverse=True)
+            codes.append(team_codes)
+            labels.append(team_ids)
+
+    dims = tuple(len(label) for label in labels)
+    flat, counts = np.unique(np.ravel_multi_index(codes, dims), return_counts=True)
+    positions = np.unravel_index(flat, dims)
+    result = {key: np.asarray(label)[pos] for key, label, pos in zip(by, labels[1:], positions[1:])}
+    result['player_api_id'] = player_ids[positions[0]]
+    result['appearances'] = counts
+    result = pd.DataFrame(result)
+    if 'season' in by and isinstance(lineups['season'].dtype, pd.CategoricalDtype):
+        result['season'] = pd.Categorical(result['season'], dtype=lineups['season'].dtype)
+    return result
+
+
+def top_appearances(counts, n=10, names=None, by=None):
+    """The ``n`` most frequent players (per ``by`` group), named via ``names``.
+
+    ``names`` maps ``player_api_id`` to ``player_name``; it is applied only
+    to the selected rows.
+    """
+    if by is None:
+        top = top_k(counts, 'appearances', n)
+    else:
+        top = pd.concat([top_k(group, 'appearances', n) for _, group in counts.groupby(by, observed=True)])
+    top = top.reset_index(drop=True)
+    if names is not None:
+        top.insert(0, 'player_name', top['player_api_id'].map(names))
+    return top
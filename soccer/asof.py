@@ -0,0 +1,92 @@
+"""Attach dated attribute snapshots to matches as of the match date.
+
+Team_Attributes and Player_Attributes are snapshots taken on given dates.
+For every (key, date) query ``asof_positions`` finds the latest snapshot of
+that key on or before the date with a single ``np.searchsorted`` over a
+composite (key code, seconds) array, so all 22 lineup slots of every match
+are resolved in one vectorized lookup instead of a merge per slot. Queries
+with no earlier snapshot (or a missing key) get NaN.
+"""
+import numpy as np
+import pandas as pd
+
+from soccer.query import LINEUP_COLUMNS
+
+
+def _seconds(dates):
+    return np.asarray(dates, dtype='datetime64[s]').astype('int64')
+
+
+def asof_positions(keys, dates, snapshot_keys, snapshot_dates):
+    """Row position in the snapshots of each query's as-of snapshot, or -1.
+
+    ``keys``/``dates`` are the queries (keys may be float with NaN for
+    unknown), ``snapshot_keys``/``snapshot_dates`` the snapshot columns in
+    any order.
+    """
+    keys = np.asarray(keys)
+    present = ~pd.isna(keys)
+    keys = np.where(present, keys, 0).astype('int64')
+    query_seconds = _seconds(dates)
+    snapshot_seconds = _seconds(snapshot_dates)
+    if len(snapshot_seconds) == 0:
+        return np.full(len(keys), -1)
+
+    origin = min(snapshot_seconds.min(), query_seconds.min())
+    span = max(snapshot_seconds.max(), query_seconds.max()) - origin + 1
+    unique_keys, snapshot_codes = np.unique(np.asarray(snapshot_keys, dtype='int64'), return_inverse=True)
+    query_codes = np.minimum(np.searchsorted(unique_keys, keys), len(unique_keys) - 1)
+    present &= unique_keys[query_codes] == keys
+
+    composite = snapshot_codes * span + (snapshot_seconds - origin)
+    order = np.argsort(composite, kind='stable')
+    found = np.searchsorted(composite[order], query_codes * span + (query_seconds - origin), side='right') - 1
+    found_codes = snapshot_codes[order][np.maximum(found, 0)]
+    valid = present & (found >= 0) & (found_codes == query_codes)
+    return np.where(valid, order[np.maximum(found, 0)], -1)
+
+
+def _take(values, positions):
+    values = np.asarray(values, dtype='float64')
+    return np.where(positions >= 0, values[np.maximum(positions, 0)], np.nan)
+
+
+def team_attributes_asof(matches, attributes, columns):
+    """``home_<col>``/``away_<col>`` team attributes at each match date.
+
+    ``matches`` needs ``date``, ``home_team_api_id`` and ``away_team_api_id``;
+    ``attributes`` needs ``team_api_id``, ``date`` and the numeric ``columns``.
+    """
+    frame = {}
+    for side in ('home', 'away'):
+        positions = asof_positions(matches[side + '_team_api_id'].to_numpy(), matches['date'].to_numpy(),
+                                   attributes['team_api_id'].to_numpy(), attributes['date'].to_numpy())
+        for column in columns:
+            frame['{}_{}'.format(side, column)] = _take(attributes[column], positions)
+    return pd.DataFrame(frame, index=matches.index)
+
+
+def player_attributes_asof(matches, attributes, columns=('overall_rating',)):
+    """``<slot>_<col>`` attributes of all 22 lineup players at each match date.
+
+    ``matches`` needs ``date`` and the lineup columns; ``attributes`` needs
+    ``player_api_id``, ``date`` and ``columns``. All slots are resolved by a
+    single lookup over the flattened lineup block.
+    """
+    block = matches[LINEUP_COLUMNS].to_numpy(dtype='float64')
+    dates = np.repeat(matches['date'].to_numpy(), len(LINEUP_COLUMNS))
+    positions = asof_positions(block.ravel(), dates,
+                               attributes['player_api_id'].to_numpy(), attributes['date'].to_numpy())
+    positions = positions.reshape(block.shape)
+    frame = {}
+    for column in columns:
+        values = _take(attributes[column], positions)
+        for slot, name in enumerate(LINEUP_COLUMNS):
+            frame['{}_{}'.format(name, column)] = values[:, slot]
+    return pd.DataFrame(frame, index=matches.index)
+
+
+def lineup_mean(player_attributes, column, side):
+    """Mean ``column`` over one side's starting eleven (NaN players skipped)."""
+    names = ['{}_player_{}_{}'.format(side, i, column) for i in range(1, 12)]
+    return player_attributes[names].mean(axis=1)
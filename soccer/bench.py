@@ -0,0 +1,211 @@
+"""Benchmark of the report pipeline, by stage and by question.
+
+``benchmark`` extracts a database into a fresh cache, loads every table,
+then runs the report graph serially in this process so each node can be
+timed on its own. Nodes without inputs (``facts``, ``players``, ...) load
+and join base frames and count as the ``merge`` stage, the question nodes
+built on them as ``aggregate``, and writing each CSV as ``write``. A
+question's end-to-end time is its own node, everything upstream of it and
+its write. The result is a JSON-serializable dict; ``compare`` flags the
+stages and questions that got slower than a baseline report.
+
+Run ``python -m soccer.bench --scale 10 --output bench.json`` to time a
+synthetic database ten times the size of the real one; ``--engines
+pandas,duckdb`` adds per-question timings of each backend.
+"""
+import argparse
+import functools
+import json
+import os
+import platform
+import sys
+import tempfile
+import time
+
+import numpy as np
+import pandas as pd
+
+from soccer import analysis, ratings, synthetic
+from soccer.dag import dependencies, run
+from soccer.report import OUTPUTS, QUESTIONS, backend_engine, tasks, write_output
+from soccer.store import TABLES, build_cache, load_table
+
+STAGES = ['extract', 'load', 'merge', 'aggregate', 'write']
+
+
+def _clear_caches():
+    """Forget the memoized base frames so every repeat recomputes them."""
+    analysis.match_facts.cache_clear()
+    analysis.players.cache_clear()
+    ratings.rating_summary.cache_clear()
+
+
+def _rows(value):
+    return len(value) if isinstance(value, (pd.DataFrame, pd.Series)) else None
+
+
+def _timed(func, *args, **kwargs):
+    start = time.perf_counter()
+    value = func(*args, **kwargs)
+    return value, time.perf_counter() - start
+
+
+def _run_once(database, cache_dir, output_dir, questions):
+    _clear_caches()
+    timings = {'stages': dict.fromkeys(STAGES, 0.0), 'tasks': {}, 'writes': {}, 'tables': {}}
+    _, timings['stages']['extract'] = _timed(build_cache, database, cache_dir, force=True)
+    for name in TABLES:
+        table, seconds = _timed(load_table, name, None, database, cache_dir)
+        timings['tables'][name] = len(table)
+        timings['stages']['load'] += seconds
+        del table
+
+    results = {}
+    for task in dependencies(tasks(database, cache_dir), questions):
+        stage = 'aggregate' if task.inputs else 'merge'
+        inputs = {argument: results[name] for argument, name in task.inputs.items()}
+        results[task.name], seconds = _timed(task.func, **inputs)
+        timings['tasks'][task.name] = {'stage': stage, 'seconds': seconds, 'rows': _rows(results[task.name])}
+        timings['stages'][stage] += seconds
+    for question in questions:
+        _, seconds = _timed(write_output, pd.DataFrame(results[question]),
+                            os.path.join(output_dir, OUTPUTS[question]))
+        timings['writes'][question] = seconds
+        timings['stages']['write'] += seconds
+    return timings
+
+
+def benchmark(database, questions=None, repeat=1, workdir=None):
+    """Time the report on ``database``; the best of ``repeat`` runs is kept per measurement."""
+    questions = QUESTIONS if questions is None else list(questions)
+    runs = []
+    with tempfile.TemporaryDirectory(prefix='soccer-bench-', dir=workdir) as scratch:
+        for _ in range(repeat):
+            cache_dir = os.path.join(scratch, 'cache')
+            output_dir = os.path.join(scratch, 'output')
+            os.makedirs(output_dir, exist_ok=True)
+            runs.append(_run_once(database, cache_dir, output_dir, questions))
+    _clear_caches()
+
+    best = runs[0]
+    stages = {stage: min(run['stages'][stage] for run in runs) for stage in STAGES}
+    task_times = {name: dict(timing, seconds=min(run['tasks'][name]['seconds'] for run in runs))
+                  for name, timing in best['tasks'].items()}
+    graph = tasks(database)
+    per_question = {}
+    for question in questions:
+        upstream = [task.name for task in dependencies(graph, [question])]
+        write = min(run['writes'][question] for run in runs)
+        per_question[question] = {'seconds': sum(task_times[name]['seconds'] for name in upstream) + write,
+                                  'write': write, 'rows': task_times[question]['rows']}
+    return {
+        'database': os.path.abspath(database),
+        'database_bytes': os.path.getsize(database),
+        'tables': best['tables'],
+        'repeat': repeat,
+        'environment': {'python': platform.python_version(), 'pandas': pd.__version__,
+                        'numpy': np.__version__, 'machine': platform.machine(), 'cpus': os.cpu_count()},
+        'stages': stages,
+        'total': sum(stages.values()),
+        'tasks': task_times,
+        'questions': per_question,
+    }
+
+
+def engine_timings(database, questions=None, backends=('pandas', 'duckdb'), repeat=1, workdir=None,
+                   sql_indexes=False):
+    """Seconds per question on each backend, best of ``repeat``.
+
+    Every question is answered on its own from an already extracted cache,
+    the pandas one with no memoized base frames, so each timing covers all
+    the work that question needs. Questions a backend cannot answer are
+    left out of its column. ``sql_indexes`` times the sql backend with its
+    indexes, which are then written into ``database``.
+    """
+    questions = QUESTIONS if questions is None else list(questions)
+    timings = {}
+    with tempfile.TemporaryDirectory(prefix='soccer-engines-', dir=workdir) as cache_dir:
+        # set every engine up first: creating the SQL indexes changes the
+        # database file, which would otherwise re-extract the cache mid-run
+        engines = {backend: backend_engine(backend, database, cache_dir, sql_indexes=sql_indexes)
+                   for backend in backends}
+        build_cache(database, cache_dir)
+        graph = tasks(database, cache_dir)
+        for backend in backends:
+            queries, answer = engines[backend]
+            if answer is None:
+                queries, answer = QUESTIONS, functools.partial(run, graph, workers=1)
+            for question in questions:
+                if question not in queries:
+                    continue
+                seconds = []
+                for _ in range(repeat):
+                    _clear_caches()
+                    seconds.append(_timed(answer, [question])[1])
+                timings.setdefault(question, {})[backend] = min(seconds)
+    _clear_caches()
+    return timings
+
+
+def compare(baseline, current, tolerance=0.25, minimum=0.05):
+    """Stages, tasks and questions at least ``tolerance`` (and ``minimum`` seconds) slower.
+
+    Returns a list of ``(section, name, baseline seconds, current seconds)``.
+    """
+    regressions = []
+    sections = [('stages', baseline['stages'], current['stages'])]
+    for section in ('tasks', 'questions'):
+        sections.append((section, {name: timing['seconds'] for name, timing in baseline[section].items()},
+                         {name: timing['seconds'] for name, timing in current[section].items()}))
+    for section, before, after in sections:
+        for name in sorted(set(before) & set(after)):
+            if after[name] > before[name] * (1 + tolerance) and after[name] - before[name] > minimum:
+                regressions.append((section, name, before[name], after[name]))
+    return regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.split('\n')[0])
+    source = parser.add_mutually_exclusive_group()
+    source.add_argument('--database', help='existing SQLite database to time')
+    source.add_argument('--scale', type=float, default=1.0,
+                        help='size of the synthetic database relative to the real one (default 1)')
+    parser.add_argument('--questions', help='comma-separated questions (default: all)')
+    parser.add_argument('--repeat', type=int, default=1)
+    parser.add_argument('--workdir', help='directory for the synthetic database and scratch cache')
+    parser.add_argument('--output', help='write the JSON report here instead of stdout')
+    parser.add_argument('--baseline', help='earlier JSON report; exit 1 if anything got slower')
+    parser.add_argument('--tolerance', type=float, default=0.25)
+    parser.add_argument('--engines', help='also time each question on these backends, e.g. pandas,duckdb')
+    args = parser.parse_args(argv)
+
+    questions = args.questions.split(',') if args.questions else None
+    with tempfile.TemporaryDirectory(prefix='soccer-synthetic-', dir=args.workdir) as scratch:
+        database = args.database
+        if database is None:
+            database = os.path.join(scratch, 'database.sqlite')
+            synthetic.generate(database, args.scale)
+        report = benchmark(database, questions, args.repeat, args.workdir)
+        if args.engines:
+            # the synthetic database is ours to index; a given one is left untouched
+            report['engines'] = engine_timings(database, questions, args.engines.split(','), args.repeat,
+                                               args.workdir, sql_indexes=args.database is None)
+    report['scale'] = None if args.database else args.scale
+
+    text = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, 'w') as f:
+            f.write(text + '\n')
+    else:
+        print(text)
+    if args.baseline:
+        with open(args.baseline) as f:
+            regressions = compare(json.load(f), report, args.tolerance)
+        for section, name, before, after in regressions:
+            print('slower {} {}: {:.3f}s -> {:.3f}s'.format(section, name, before, after), file=sys.stderr)
+        return 1 if regressions else 0
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
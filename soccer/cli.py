@@ -0,0 +1,70 @@
+"""Command-line entry point: answer report questions without Jupyter.
+
+    python -m soccer --questions appearances,team_goals --output-dir out
+
+writes the CSV files of the chosen questions (all by default) and exits.
+Nothing from IPython is used and matplotlib is only imported with
+``--figures``, so a batch run starts straight into the data work.
+"""
+import argparse
+import os
+import sys
+
+from soccer.report import BACKENDS, QUESTIONS, run_report
+from soccer.store import CACHE_DIR, DATABASE
+from soccer.trace import Tracer
+
+
+def _questions(text):
+    questions = [question.strip() for question in text.split(',') if question.strip()]
+    unknown = [question for question in questions if question not in QUESTIONS]
+    if unknown:
+        raise argparse.ArgumentTypeError('unknown questions: {} (see --list)'.format(', '.join(unknown)))
+    return questions
+
+
+def _formats(text):
+    return tuple(extension.strip().lower() for extension in text.split(',') if extension.strip())
+
+
+def parser():
+    parser = argparse.ArgumentParser(prog='python -m soccer', description=__doc__.split('\n')[0])
+    parser.add_argument('--questions', type=_questions, help='comma-separated questions (default: all)')
+    parser.add_argument('--list', action='store_true', help='print the available questions and exit')
+    parser.add_argument('--output-dir', default='.', help='where the CSV files go (default: .)')
+    parser.add_argument('--figures', metavar='DIR', help='also draw the charts of the answers into DIR')
+    parser.add_argument('--figure-formats', type=_formats, default=('png',),
+                        help='comma-separated image formats of --figures (default: png)')
+    parser.add_argument('--database', default=DATABASE)
+    parser.add_argument('--cache-dir', default=CACHE_DIR)
+    parser.add_argument('--workers', type=int, help='worker processes (default: one per CPU; 1 runs in-process)')
+    parser.add_argument('--backend', choices=BACKENDS, default='pandas')
+    parser.add_argument('--sql-indexes', action='store_true',
+                        help='with --backend sql, first add indexes on the Match keys to the database file')
+    parser.add_argument('--no-cache', action='store_true', help='recompute every question')
+    parser.add_argument('--trace', metavar='JSONL', help='record every step to this JSON lines file')
+    parser.add_argument('--chrome-trace', metavar='JSON', help='also write the trace in Chrome trace format')
+    return parser
+
+
+def main(argv=None):
+    args = parser().parse_args(argv)
+    if args.list:
+        print('\n'.join(QUESTIONS))
+        return 0
+    if not os.path.exists(args.database):
+        print('database not found: {}'.format(args.database), file=sys.stderr)
+        return 2
+    tracer = None
+    if args.trace or args.chrome_trace:
+        tracer = Tracer(args.trace, args.chrome_trace)
+    paths = run_report(args.questions, args.output_dir, args.database, args.cache_dir, args.workers,
+                       not args.no_cache, tracer, args.backend, args.figures,
+                       args.figure_formats, args.sql_indexes)
+    for question, path in paths.items():
+        print('{}\t{}'.format(question, path))
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
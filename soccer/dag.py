@@ -0,0 +1,154 @@
+"""A small task graph executed on a process pool.
+
+Each ``Task`` names the tasks whose results it takes as keyword arguments.
+``run`` submits a task as soon as all of its inputs are done, so independent
+branches run concurrently and the total wall time approaches that of the
+longest branch. DataFrame results are handed between processes as Arrow IPC
+files in a scratch directory and memory-mapped by their consumers, so a
+shared base frame is computed once and never pickled per consumer.
+"""
+import collections
+import concurrent.futures
+import os
+import tempfile
+
+import pandas as pd
+import pyarrow as pa
+
+from soccer.results import MISSING, task_key
+from soccer.trace import measure
+
+# tables: the cached database tables a base node loads, keyed on their fingerprints
+Task = collections.namedtuple('Task', ['name', 'func', 'inputs', 'tables'])
+Task.__new__.__defaults__ = ({}, ())
+
+
+def dependencies(tasks, targets=None):
+    """The tasks needed for ``targets`` (all if None), in dependency order."""
+    by_name = {task.name: task for task in tasks}
+    ordered = []
+    state = {}
+
+    def visit(name, path):
+        if state.get(name) == 'done':
+            return
+        if name in path:
+            raise ValueError('cycle in task graph: {}'.format(' -> '.join(path + [name])))
+        if name not in by_name:
+            raise KeyError('unknown task: {}'.format(name))
+        for upstream in by_name[name].inputs.values():
+            visit(upstream, path + [name])
+        state[name] = 'done'
+        ordered.append(by_name[name])
+
+    for name in (by_name if targets is None else targets):
+        visit(name, [])
+    return ordered
+
+
+def _store(value, path):
+    """Spill DataFrames to an Arrow IPC file; anything else is returned as is."""
+    if not isinstance(value, pd.DataFrame):
+        return ('value', value)
+    table = pa.Table.from_pandas(value)
+    with pa.OSFile(path, 'wb') as sink, pa.ipc.new_file(sink, table.schema) as writer:
+        writer.write_table(table)
+    return ('arrow', path)
+
+
+def _load(handle):
+    kind, value = handle
+    if kind == 'value':
+        return value
+    with pa.memory_map(value) as source:
+        return pa.ipc.open_file(source).read_all().to_pandas()
+
+
+def _execute(task, handles, path, cache=None, key=None, memory=None):
+    """Run ``task`` in a worker; returns its handle and, when traced, its record."""
+    inputs = {argument: _load(handle) for argument, handle in handles.items()}
+    if memory is None:
+        value, record = task.func(**inputs), None
+    else:
+        value, record = measure(task.name, task.func, inputs, memory)
+    if cache is not None:
+        cache.put(key, value)
+    return _store(value, path), record
+
+
+def _plan(needed, targets, cache, salt, tables):
+    """Cache keys of the needed tasks, the cached values to reuse and the tasks to run.
+
+    Walking back from the targets, a task with a cached result stops the
+    walk: neither it nor anything upstream of it has to run.
+    """
+    by_name = {task.name: task for task in needed}
+    keys = {}
+    for task in needed:
+        keys[task.name] = task_key(task, {arg: keys[name] for arg, name in task.inputs.items()}, salt, tables)
+    hits = {}
+    to_run = set()
+
+    def require(name):
+        if name in hits or name in to_run:
+            return
+        value = cache.get(keys[name])
+        if value is not MISSING:
+            hits[name] = value
+            return
+        to_run.add(name)
+        for upstream in by_name[name].inputs.values():
+            require(upstream)
+
+    for name in targets:
+        require(name)
+    return keys, hits, [task for task in needed if task.name in to_run]
+
+
+def run(tasks, targets=None, workers=None, cache=None, salt='', tracer=None, tables=None):
+    """Run the graph and return ``{name: result}`` for ``targets`` (or all).
+
+    ``workers=1`` runs everything in this process, in dependency order.
+    With a ``results.ResultCache``, tasks whose key (see ``results.task_key``,
+    seeded with ``salt``, base nodes keyed on the ``{table: fingerprint}``
+    of the ``tables`` they declare) is cached are not recomputed. With a
+    ``trace.Tracer`` every task that runs is measured and recorded.
+    """
+    needed = dependencies(tasks, targets)
+    targets = [task.name for task in needed] if targets is None else list(targets)
+    if cache is None:
+        keys, hits, to_run = {}, {}, needed
+    else:
+        keys, hits, to_run = _plan(needed, targets, cache, salt, tables)
+
+    if workers == 1:
+        results = dict(hits)
+        for task in to_run:
+            inputs = {arg: results[name] for arg, name in task.inputs.items()}
+            if tracer is None:
+                results[task.name] = task.func(**inputs)
+            else:
+                results[task.name] = tracer.measure(task.name, task.func, inputs)
+            if cache is not None:
+                cache.put(keys[task.name], results[task.name])
+        return {name: results[name] for name in targets}
+
+    with tempfile.TemporaryDirectory(prefix='soccer-dag-') as scratch, \
+            concurrent.futures.ProcessPoolExecutor(workers) as pool:
+        handles = {name: _store(value, os.path.join(scratch, name + '.arrow')) for name, value in hits.items()}
+        waiting = list(to_run)
+        running = {}
+        while waiting or running:
+            for task in [t for t in waiting if all(name in handles for name in t.inputs.values())]:
+                waiting.remove(task)
+                inputs = {arg: handles[name] for arg, name in task.inputs.items()}
+                path = os.path.join(scratch, task.name + '.arrow')
+                memory = None if tracer is None else tracer.memory
+                future = pool.submit(_execute, task, inputs, path, cache, keys.get(task.name), memory)
+                running[future] = task.name
+            done, _ = concurrent.futures.wait(running, return_when=concurrent.futures.FIRST_COMPLETED)
+            for future in done:
+                handles[running.pop(future)], record = future.result()
+                if record is not None:
+                    tracer.add(record)
+        return {name: _load(handles[name]) for name in targets}
@@ -0,0 +1,125 @@
+"""The report questions on DuckDB, an optional in-process columnar engine.
+
+Each table is exposed to DuckDB as a view over its Parquet file in the
+data cache (or, with ``source='sqlite'``, over ``database.sqlite`` itself
+through DuckDB's sqlite extension). DuckDB runs the queries vectorized on
+all cores and spills to ``<cache_dir>/duckdb`` when an operator outgrows
+``memory_limit``. The goal and win questions reuse the ``pushdown``
+queries; appearance counting unpivots the 22 lineup columns, the
+team-attribute question is an ``ASOF JOIN`` to the attribute snapshots and
+bookmaker margins are one aggregate over the odds columns. Every answer
+has the columns, rows and tie order of the pandas version.
+"""
+import os
+
+from soccer.analysis import TEAM_ATTRIBUTES
+from soccer.odds import BOOKMAKERS
+from soccer.pushdown import QUERIES as SQL_QUERIES
+from soccer.query import LINEUP_COLUMNS
+from soccer.store import CACHE_DIR, DATABASE, DATE_COLUMNS, TABLES, build_cache, table_path
+
+SOURCES = ['parquet', 'sqlite']
+
+_APPEARANCES = '''
+    WITH slots AS (
+        UNPIVOT (SELECT {columns} FROM Match) ON {columns} INTO NAME slot VALUE player_api_id
+    )
+    SELECT p.player_name, s.player_api_id, s.appearances
+    FROM (SELECT CAST(player_api_id AS BIGINT) AS player_api_id, COUNT(*) AS appearances
+          FROM slots GROUP BY 1) s
+    LEFT JOIN Player p ON p.player_api_id = s.player_api_id
+    ORDER BY s.appearances DESC, s.player_api_id
+    LIMIT 10
+'''.format(columns=', '.join(LINEUP_COLUMNS))
+
+_ATTRIBUTE_SHARE = '''
+    SELECT '{column}' AS attribute, {position} AS position,
+           COUNT(*) FILTER (WHERE decided AND {column} <> 0) AS matches,
+           ROUND(COUNT(*) FILTER (WHERE decided AND {column} <> 0 AND ({column} > 0) = home_won)
+                 / GREATEST(COUNT(*) FILTER (WHERE decided AND {column} <> 0), 1), 4) AS higher_won
+    FROM differences
+'''
+
+_WINNING_TEAM_ATTRIBUTES = '''
+    WITH home AS (SELECT m.id, m.home_team_goal, m.away_team_goal, {home} FROM Match m
+                  ASOF LEFT JOIN Team_Attributes t
+                  ON m.home_team_api_id = t.team_api_id AND m.date >= t.date),
+    away AS (SELECT m.id, {away} FROM Match m
+             ASOF LEFT JOIN Team_Attributes t
+             ON m.away_team_api_id = t.team_api_id AND m.date >= t.date),
+    differences AS MATERIALIZED (
+        SELECT home.home_team_goal <> home.away_team_goal AS decided,
+               home.home_team_goal > home.away_team_goal AS home_won, {differences}
+        FROM home JOIN away USING (id))
+    SELECT attribute, matches, higher_won FROM ({shares})
+    ORDER BY higher_won DESC, position
+'''.format(home=', '.join('t.{0} AS home_{0}'.format(column) for column in TEAM_ATTRIBUTES),
+           away=', '.join('t.{0} AS away_{0}'.format(column) for column in TEAM_ATTRIBUTES),
+           differences=', '.join('home_{0} - away_{0} AS {0}'.format(column) for column in TEAM_ATTRIBUTES),
+           shares=' UNION ALL '.join(_ATTRIBUTE_SHARE.format(column=column, position=position)
+                                     for position, column in enumerate(TEAM_ATTRIBUTES)))
+
+_BOOKMAKER_MARGIN = '''
+    SELECT '{bookmaker}' AS bookmaker, {position} AS position,
+           COUNT(margin) AS matches, ROUND(AVG(margin), 4) AS margin
+    FROM (SELECT CASE WHEN {bookmaker}H > 0 AND {bookmaker}D > 0 AND {bookmaker}A > 0
+                      THEN 1 / {bookmaker}H + 1 / {bookmaker}D + 1 / {bookmaker}A - 1 END AS margin
+          FROM Match)
+'''
+
+_BOOKMAKER_MARGINS = '''
+    SELECT bookmaker, matches, margin FROM ({margins}) ORDER BY position
+'''.format(margins=' UNION ALL '.join(_BOOKMAKER_MARGIN.format(bookmaker=bookmaker, position=position)
+                                       for position, bookmaker in enumerate(BOOKMAKERS)))
+
+QUERIES = dict(SQL_QUERIES, appearances=_APPEARANCES, winning_team_attributes=_WINNING_TEAM_ATTRIBUTES,
+               bookmaker_margins=_BOOKMAKER_MARGINS)
+
+
+def connect(database=DATABASE, cache_dir=CACHE_DIR, source='parquet', threads=None, memory_limit=None):
+    """A DuckDB connection with a view per table of ``database``.
+
+    ``threads`` defaults to all cores; past ``memory_limit`` (e.g. '4GB')
+    operators spill to ``<cache_dir>/duckdb``.
+    """
+    try:
+        # imported here so that only runs using this engine pay for it
+        import duckdb
+    except ImportError:
+        raise ImportError('the duckdb engine needs the duckdb package')
+    if source not in SOURCES:
+        raise ValueError('unknown source: {}'.format(source))
+    con = duckdb.connect()
+    spill = os.path.join(cache_dir, 'duckdb')
+    os.makedirs(spill, exist_ok=True)
+    con.execute("SET temp_directory = '{}'".format(spill))
+    if threads is not None:
+        con.execute('SET threads = {:d}'.format(threads))
+    if memory_limit is not None:
+        con.execute("SET memory_limit = '{}'".format(memory_limit))
+    if source == 'parquet':
+        build_cache(database, cache_dir)
+        for name in TABLES:
+            con.execute("CREATE VIEW \"{}\" AS SELECT * FROM read_parquet('{}')"
+                        .format(name, table_path(name, cache_dir)))
+    else:
+        con.execute("ATTACH '{}' AS source (TYPE sqlite, READ_ONLY)".format(database))
+        for name in TABLES:
+            dates = ', '.join('CAST("{0}" AS TIMESTAMP) AS "{0}"'.format(column)
+                              for column in DATE_COLUMNS.get(name, []))
+            columns = '* REPLACE ({})'.format(dates) if dates else '*'
+            con.execute('CREATE VIEW "{0}" AS SELECT {1} FROM source."{0}"'.format(name, columns))
+    return con
+
+
+def run_queries(questions, database=DATABASE, cache_dir=CACHE_DIR, source='parquet', threads=None,
+                memory_limit=None):
+    """``{question: DataFrame}`` for ``questions``, computed by DuckDB."""
+    unknown = [question for question in questions if question not in QUERIES]
+    if unknown:
+        raise KeyError('no DuckDB query for questions: {}'.format(unknown))
+    con = connect(database, cache_dir, source, threads, memory_limit)
+    try:
+        return {question: con.sql(QUERIES[question]).df() for question in questions}
+    finally:
+        con.close()
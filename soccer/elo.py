@@ -0,0 +1,110 @@
+"""Elo team ratings over the match history.
+
+Matches are processed in date order by one tight sequential loop over plain
+arrays (compiled with numba when it is installed). Every team starts at
+``initial``; the home side gets ``home_advantage`` points in the expected
+score, and with ``goal_difference`` the update is scaled by the winning
+margin (x1.5 for two goals, x(11 + n)/8 for n >= 3). Improvement compares
+each team's rating at the end of its first and last season played, so teams
+absent from some seasons are still ranked.
+"""
+import functools
+
+import numpy as np
+import pandas as pd
+
+from soccer import analysis
+from soccer.topk import top_k
+
+
+def _elo_loop(home, away, home_goals, away_goals, n_teams, k, home_advantage, initial, goal_difference):
+    ratings = np.full(n_teams, initial)
+    home_before = np.empty(len(home))
+    away_before = np.empty(len(home))
+    change = np.empty(len(home))
+    for i in range(len(home)):
+        rating_home = ratings[home[i]]
+        rating_away = ratings[away[i]]
+        expected = 1.0 / (1.0 + 10.0 ** ((rating_away - rating_home - home_advantage) / 400.0))
+        margin = home_goals[i] - away_goals[i]
+        score = 1.0 if margin > 0 else 0.0 if margin < 0 else 0.5
+        multiplier = 1.0
+        if goal_difference:
+            margin = abs(margin)
+            if margin == 2:
+                multiplier = 1.5
+            elif margin >= 3:
+                multiplier = (11.0 + margin) / 8.0
+        delta = k * multiplier * (score - expected)
+        ratings[home[i]] = rating_home + delta
+        ratings[away[i]] = rating_away - delta
+        home_before[i] = rating_home
+        away_before[i] = rating_away
+        change[i] = delta
+    return home_before, away_before, change
+
+
+@functools.lru_cache(maxsize=None)
+def _compiled_loop():
+    """``_elo_loop`` compiled with numba if it is installed; imported on first use only."""
+    try:
+        from numba import njit
+    except ImportError:  # optional: the plain loop runs ~26k matches well under a second
+        return _elo_loop
+    return njit(cache=True)(_elo_loop)
+
+
+def elo_ratings(facts=None, k=20.0, home_advantage=100.0, initial=1500.0, goal_difference=True):
+    """Per match, in date order: both teams' ratings before it and the points exchanged."""
+    facts = analysis.match_facts() if facts is None else facts
+    facts = facts.sort_values(['date', 'match_id'], kind='stable', ignore_index=True)
+    ids = np.concatenate([facts['home_team_api_id'].to_numpy(), facts['away_team_api_id'].to_numpy()])
+    codes, teams = pd.factorize(ids)
+    home, away = codes[:len(facts)], codes[len(facts):]
+    home_before, away_before, change = _compiled_loop()(
+        home.astype('int64'), away.astype('int64'),
+        facts['home_team_goal'].to_numpy(dtype='int64'), facts['away_team_goal'].to_numpy(dtype='int64'),
+        len(teams), float(k), float(home_advantage), float(initial), bool(goal_difference))
+    ratings = facts[['match_id', 'date', 'season', 'league_name', 'home_team_api_id', 'away_team_api_id']].copy()
+    ratings['home_elo'] = home_before
+    ratings['away_elo'] = away_before
+    ratings['elo_change'] = change
+    return ratings
+
+
+def rating_history(ratings=None):
+    """One row per team per match with its rating after the match."""
+    ratings = elo_ratings() if ratings is None else ratings
+    sides = []
+    for side, sign in (('home', 1.0), ('away', -1.0)):
+        sides.append(pd.DataFrame({'match_id': ratings['match_id'].to_numpy(),
+                                   'date': ratings['date'].to_numpy(),
+                                   'season': ratings['season'],
+                                   'team_api_id': ratings[side + '_team_api_id'].to_numpy(),
+                                   'rating': (ratings[side + '_elo'] + sign * ratings['elo_change']).to_numpy()}))
+    history = pd.concat(sides, ignore_index=True)
+    return history.sort_values(['date', 'match_id'], kind='stable', ignore_index=True)
+
+
+def season_end_ratings(history=None):
+    """Each team's rating after its last match of every season it played."""
+    history = rating_history() if history is None else history
+    last = history.groupby(['team_api_id', 'season'], observed=True, as_index=False).tail(1)
+    return last[['team_api_id', 'season', 'rating']].sort_values(['team_api_id', 'season'], ignore_index=True)
+
+
+def elo_improvement(n=None, history=None, team_names=None):
+    """Rating gained between the end of each team's first and last season."""
+    season_end = season_end_ratings(history)
+    grouped = season_end.groupby('team_api_id')
+    improvement = pd.DataFrame({'first_season': grouped['season'].first(),
+                                'last_season': grouped['season'].last(),
+                                'seasons': grouped.size(),
+                                'first_rating': grouped['rating'].first().round(1),
+                                'last_rating': grouped['rating'].last().round(1)})
+    improvement['improvement'] = (improvement['last_rating'] - improvement['first_rating']).round(1)
+    improvement = improvement.reset_index()
+    team_names = analysis.team_names() if team_names is None else team_names
+    improvement.insert(1, 'team', improvement['team_api_id'].map(team_names))
+    ranked = top_k(improvement, 'improvement', len(improvement) if n is None else n)
+    return ranked.reset_index(drop=True)
@@ -0,0 +1,142 @@
+"""Long-format match events parsed from the Match XML columns.
+
+``goal``, ``shoton``, ``shotoff``, ``foulcommit``, ``card``, ``cross``,
+``corner`` and ``possession`` hold one XML document per match with a
+``<value>`` element per event. They are streamed out of SQLite in chunks,
+parsed incrementally with ``XMLPullParser`` on a process pool, and flattened
+into one compact row per event. The table is persisted in the data cache, so
+scorer, card or possession analyses never touch the XML again.
+"""
+import concurrent.futures
+import functools
+import os
+import xml.etree.ElementTree as ET
+
+import pandas as pd
+
+from soccer.analysis import match_facts
+from soccer.query import read_match
+from soccer.store import CACHE_DIR, DATABASE, load_derived
+from soccer.topk import top_k
+
+XML_COLUMNS = ['goal', 'shoton', 'shotoff', 'foulcommit', 'card', 'cross', 'corner', 'possession']
+
+# event field -> <value> child it is read from, in order of preference
+INTEGER_FIELDS = {
+    'minute': ['elapsed'],
+    'extra_minute': ['elapsed_plus'],
+    'team_api_id': ['team'],
+    'player_api_id': ['player1'],
+    'player2_api_id': ['player2'],
+    'homepos': ['homepos'],
+    'awaypos': ['awaypos'],
+}
+SUBTYPE_FIELDS = ['goal_type', 'card_type', 'subtype', 'comment']
+
+EVENT_COLUMNS = ['match_id', 'event'] + list(INTEGER_FIELDS) + ['subtype']
+
+
+def _integer(text):
+    try:
+        return int(text)
+    except (TypeError, ValueError):
+        return None
+
+
+def parse_events(match_id, event, document, rows):
+    """Append one row per top-level ``<value>`` of ``document`` to ``rows``."""
+    if not document:
+        return
+    parser = ET.XMLPullParser(events=('start', 'end'))
+    parser.feed(document)
+    depth = 0
+    for kind, element in parser.read_events():
+        if kind == 'start':
+            depth += 1
+            continue
+        depth -= 1
+        if depth != 1 or element.tag != 'value':
+            continue
+        fields = {child.tag: child.text for child in element}
+        row = [match_id, event]
+        for sources in INTEGER_FIELDS.values():
+            row.append(_integer(next((fields[tag] for tag in sources if tag in fields), None)))
+        row.append(next((fields[tag] for tag in SUBTYPE_FIELDS if fields.get(tag)), None))
+        rows.append(row)
+        element.clear()
+
+
+def parse_chunk(chunk):
+    """Events of every XML column of a chunk of Match rows."""
+    rows = []
+    ids = chunk['id'].to_numpy()
+    for event in XML_COLUMNS:
+        for match_id, document in zip(ids, chunk[event].to_numpy()):
+            if isinstance(document, str):
+                parse_events(int(match_id), event, document, rows)
+    return _frame(rows)
+
+
+def _frame(rows):
+    frame = pd.DataFrame(rows, columns=EVENT_COLUMNS)
+    frame['match_id'] = frame['match_id'].astype('int32')
+    frame['event'] = pd.Categorical(frame['event'], categories=XML_COLUMNS)
+    for column in INTEGER_FIELDS:
+        frame[column] = frame[column].astype('Int32')
+    frame['subtype'] = frame['subtype'].astype('category')
+    return frame
+
+
+def extract_events(database=DATABASE, chunksize=2000, workers=None):
+    """Parse all Match XML columns of ``database`` into the event table.
+
+    At most two chunks per worker are in flight, so memory stays bounded by
+    the chunk size rather than the whole XML payload.
+    """
+    chunks = read_match(['id'] + XML_COLUMNS, database=database, chunksize=chunksize)
+    workers = workers or os.cpu_count()
+    parts = []
+    with concurrent.futures.ProcessPoolExecutor(workers) as pool:
+        limit = 2 * workers
+        pending = []
+        for chunk in chunks:
+            pending.append(pool.submit(parse_chunk, chunk))
+            if len(pending) >= limit:
+                parts.append(pending.pop(0).result())
+        parts.extend(future.result() for future in pending)
+    if not parts:
+        return _frame([])
+    events = pd.concat(parts, ignore_index=True)
+    for column in ('event', 'subtype'):
+        events[column] = events[column].astype('category')
+    return events
+
+
+@functools.lru_cache(maxsize=None)
+def match_events(database=DATABASE, cache_dir=CACHE_DIR):
+    """The persisted event table, re-parsed when Match is re-extracted or its parser changes."""
+    return load_derived('match_events', functools.partial(extract_events, database),
+                        ['Match'], database, cache_dir)
+
+
+def top_scorers(n=10, events=None, names=None):
+    """Players with most goals, own goals excluded."""
+    events = match_events() if events is None else events
+    goals = events[(events['event'] == 'goal') & (events['subtype'] != 'o') & events['player_api_id'].notna()]
+    counts = goals.groupby('player_api_id').size().rename('goals').reset_index()
+    top = top_k(counts, 'goals', n).reset_index(drop=True)
+    if names is not None:
+        top.insert(0, 'player_name', top['player_api_id'].map(names))
+    return top
+
+
+def possession_by_season(events=None, facts=None):
+    """Average home possession per league and season from the last reading of each match."""
+    events = match_events() if events is None else events
+    facts = match_facts() if facts is None else facts
+    possession = events[(events['event'] == 'possession') & events['homepos'].notna()]
+    last = possession.sort_values(['match_id', 'minute'], kind='stable').groupby('match_id').tail(1)
+    last = last.set_index('match_id')['homepos'].astype('float64')
+    frame = facts[['match_id', 'league_name', 'season']].assign(homepos=facts['match_id'].map(last).to_numpy())
+    frame = frame.dropna(subset=['homepos'])
+    return frame.groupby(['league_name', 'season'], observed=True, as_index=False)['homepos'].mean().round(2)
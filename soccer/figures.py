@@ -0,0 +1,162 @@
+"""The notebook's bar and pie charts, rendered headlessly and in bulk.
+
+``chart_jobs`` turns precomputed question tables into one ``Job`` per
+chart: the notebook's bar charts, a home/away/draw pie for every league and
+a top-scoring-teams bar chart for every league and season. ``render_jobs``
+spreads the jobs in batches over worker processes. Each worker draws with
+matplotlib's object-oriented API on an Agg canvas (no pyplot, no GUI
+backend) and keeps one figure template per chart kind that it clears and
+reuses, rather than building a new figure for every chart. Files are
+written in every requested format (PNG, SVG, ...).
+
+Importing this module is what pulls in matplotlib; nothing else in the
+package does.
+"""
+import collections
+import concurrent.futures
+import functools
+import os
+import re
+
+from matplotlib.backends.backend_agg import FigureCanvasAgg
+from matplotlib.figure import Figure
+
+Chart = collections.namedtuple('Chart', ['x', 'y', 'xlabel', 'title', 'color'])
+Job = collections.namedtuple('Job', ['name', 'kind', 'frame', 'chart'])
+
+GOALS_COLOR = '#8DB600'
+WINS_COLOR = '#A7F432'
+RESULT_COLORS = {'home_team': 'yellow', 'away_team': 'red', 'Draw': 'limegreen'}
+
+# question -> chart, as plotted in the notebook
+CHARTS = {
+    'team_season_goals': Chart('team', 'goals', 'Teams', 'Teams with most goals in a single season', GOALS_COLOR),
+    'team_goals': Chart('team', 'goals', 'Teams', 'Teams with most goals', GOALS_COLOR),
+    'season_goals': Chart('season', 'goals', 'Seasons', 'Total number of goals scored each season', GOALS_COLOR),
+    'league_goals': Chart('league_name', 'goals', 'Leagues', 'Total number of goals scored in each league',
+                          GOALS_COLOR),
+    'win_home_away': Chart('league_name', 'total', 'European Leagues',
+                           'Home team win ratio to away win ratio in the different european leagues', None),
+    'away_wins': Chart('team', 'away_wins', 'Teams', 'Teams with most away wins', WINS_COLOR),
+    'home_wins': Chart('team', 'home_wins', 'Teams', 'Teams with most home wins', WINS_COLOR),
+}
+
+# (figsize, margins) per chart kind; fixed margins leave room for the
+# rotated labels, so a chart is drawn once rather than twice as with
+# bbox_inches='tight'
+TEMPLATES = {
+    'bar': ((14, 10), dict(left=0.08, right=0.98, top=0.94, bottom=0.42)),
+    'grouped': ((14, 10), dict(left=0.08, right=0.98, top=0.94, bottom=0.42)),
+    'pie': ((8, 8), dict(left=0.05, right=0.95, top=0.9, bottom=0.08)),
+}
+
+
+def _slug(text):
+    return re.sub(r'[^0-9A-Za-z]+', '_', str(text)).strip('_').lower()
+
+
+def chart_jobs(results, top=20, breakdowns=True):
+    """One ``Job`` per chart of the ``{question: frame}`` results.
+
+    With ``breakdowns`` there is also a result pie per league (from
+    ``win_home_away``) and a top teams chart per league and season (from
+    ``team_season_goals``).
+    """
+    jobs = []
+    for question, frame in results.items():
+        if question not in CHARTS:
+            continue
+        chart = CHARTS[question]
+        if question == 'win_home_away':
+            jobs.append(Job(question, 'grouped', frame, chart))
+        else:
+            jobs.append(Job(question, 'bar', frame.head(top), chart))
+    if not breakdowns:
+        return jobs
+    if 'win_home_away' in results:
+        for league, frame in results['win_home_away'].groupby('league_name', observed=True, sort=False):
+            chart = Chart('winner', 'total', str(league), 'Home-away win ratio in {}'.format(league), None)
+            jobs.append(Job('win_ratio_' + _slug(league), 'pie', frame, chart))
+    if 'team_season_goals' in results:
+        groups = results['team_season_goals'].groupby(['league_name', 'season'], observed=True, sort=False)
+        for (league, season), frame in groups:
+            chart = Chart('team', 'goals', 'Teams', 'Teams with most goals in {} {}'.format(league, season),
+                          GOALS_COLOR)
+            jobs.append(Job('team_season_goals_{}_{}'.format(_slug(league), _slug(season)), 'bar',
+                            frame.head(top), chart))
+    return jobs
+
+
+@functools.lru_cache(maxsize=None)
+def _template(kind):
+    """This process's reusable ``(figure, axes)`` for charts of ``kind``."""
+    size, margins = TEMPLATES[kind]
+    figure = Figure(figsize=size)
+    figure.subplots_adjust(**margins)
+    FigureCanvasAgg(figure)
+    return figure, figure.subplots()
+
+
+def _bars(axes, frame, chart):
+    positions = range(len(frame))
+    axes.bar(positions, frame[chart.y], width=0.75, color=chart.color, label=chart.y)
+    axes.set_xticks(positions, frame[chart.x].astype(str), rotation=90, fontsize=16)
+    axes.legend()
+
+
+def _grouped_bars(axes, frame, chart):
+    wide = frame.pivot(index=chart.x, columns='winner', values=chart.y)
+    width = 0.75 / len(wide.columns)
+    for offset, winner in enumerate(wide.columns):
+        positions = [i + (offset - (len(wide.columns) - 1) / 2) * width for i in range(len(wide))]
+        axes.bar(positions, wide[winner], width=width, color=RESULT_COLORS.get(str(winner)), label=str(winner))
+    axes.set_xticks(range(len(wide)), wide.index.astype(str), rotation=90, fontsize=16)
+    axes.legend()
+
+
+def _pie(axes, frame, chart):
+    labels = frame[chart.x].astype(str)
+    axes.pie(frame[chart.y], labels=labels, colors=[RESULT_COLORS.get(label) for label in labels],
+             autopct='%.0f%%', textprops={'fontsize': 14})
+
+
+DRAW = {'bar': _bars, 'grouped': _grouped_bars, 'pie': _pie}
+
+
+def draw(job, output_dir, formats=('png',)):
+    """Draw ``job`` on its kind's template and save it in every format; returns the paths."""
+    figure, axes = _template(job.kind)
+    axes.clear()
+    DRAW[job.kind](axes, job.frame, job.chart)
+    axes.set_xlabel(job.chart.xlabel, fontsize=20 if job.kind == 'pie' else 24)
+    axes.set_title(job.chart.title, fontsize=24)
+    paths = []
+    for extension in formats:
+        paths.append(os.path.join(output_dir, '{}.{}'.format(job.name, extension)))
+        figure.savefig(paths[-1])
+    return paths
+
+
+def _draw_batch(jobs, output_dir, formats):
+    return {job.name: draw(job, output_dir, formats) for job in jobs}
+
+
+def render_jobs(jobs, output_dir='.', formats=('png',), workers=None):
+    """Render ``jobs`` on ``workers`` processes (1: in this process); returns ``{name: [paths]}``."""
+    os.makedirs(output_dir, exist_ok=True)
+    workers = min(workers or os.cpu_count(), max(len(jobs), 1))
+    if workers == 1:
+        return _draw_batch(jobs, output_dir, formats)
+    # a few batches per worker: each process sets up its templates once
+    # while slow charts still balance across workers
+    batches = [jobs[start::workers * 2] for start in range(workers * 2)]
+    paths = {}
+    with concurrent.futures.ProcessPoolExecutor(workers) as pool:
+        for done in pool.map(_draw_batch, batches, [output_dir] * len(batches), [formats] * len(batches)):
+            paths.update(done)
+    return paths
+
+
+def render_all(results, output_dir='.', formats=('png',), workers=None, top=20, breakdowns=True):
+    """Charts of the ``{question: frame}`` results; returns ``{chart name: [paths]}``."""
+    return render_jobs(chart_jobs(results, top, breakdowns), output_dir, formats, workers)
@@ -0,0 +1,117 @@
+"""Bookmaker odds analytics over the Match odds columns.
+
+The ``<bookmaker>H/D/A`` columns are read on their own from the store and
+stacked into one ``(matches, bookmakers, 3)`` array; implied probabilities,
+margins, consensus and favourite accuracy are plain NumPy reductions over
+it, with missing odds as NaN. Outcomes use ``analysis.result_codes``, the
+same home/away/draw rule as the ``winner`` column.
+"""
+import warnings
+
+import numpy as np
+import pandas as pd
+
+from soccer.analysis import result_codes
+from soccer.store import CACHE_DIR, DATABASE, load_table
+
+BOOKMAKERS = ['B365', 'BW', 'IW', 'LB', 'PS', 'WH', 'SJ', 'VC', 'GB', 'BS']
+OUTCOMES = ['H', 'D', 'A']
+ODDS_COLUMNS = [bookmaker + outcome for bookmaker in BOOKMAKERS for outcome in OUTCOMES]
+
+# result_codes order (home, away, draw) -> position in OUTCOMES
+_OUTCOME_OF_RESULT = np.array([0, 2, 1])
+
+
+def load_odds(database=DATABASE, cache_dir=CACHE_DIR):
+    """Odds columns plus the keys and goals needed to label outcomes."""
+    columns = ['id', 'league_id', 'season', 'home_team_goal', 'away_team_goal'] + ODDS_COLUMNS
+    return load_table('Match', columns, database, cache_dir)
+
+
+def odds_block(frame):
+    """``(matches, bookmakers, 3)`` decimal odds; non-positive odds become NaN."""
+    block = frame[ODDS_COLUMNS].to_numpy(dtype='float64').reshape(len(frame), len(BOOKMAKERS), len(OUTCOMES))
+    return np.where(block > 0, block, np.nan)
+
+
+def implied_probabilities(block):
+    """Raw implied probabilities ``1 / odds``."""
+    return 1.0 / block
+
+
+def margins(block):
+    """Bookmaker margin (overround) per match and bookmaker; NaN unless all three odds are priced."""
+    implied = implied_probabilities(block)
+    total = implied.sum(axis=2)
+    return np.where(np.isnan(implied).any(axis=2), np.nan, total - 1.0)
+
+
+def fair_probabilities(block):
+    """Implied probabilities with each bookmaker's margin removed."""
+    implied = implied_probabilities(block)
+    return implied / (margins(block) + 1.0)[:, :, None]
+
+
+def consensus(block):
+    """Mean margin-free probabilities over the bookmakers that priced a match."""
+    with warnings.catch_warnings():
+        # matches without any odds give an all-NaN slice
+        warnings.simplefilter('ignore', RuntimeWarning)
+        return np.nanmean(fair_probabilities(block), axis=1)
+
+
+def outcomes(frame):
+    """Position in ``OUTCOMES`` of each match's actual result."""
+    return _OUTCOME_OF_RESULT[result_codes(frame['home_team_goal'], frame['away_team_goal'])]
+
+
+def match_odds(frame=None):
+    """Per match: consensus probabilities/odds, mean margin and favourite outcome."""
+    frame = load_odds() if frame is None else frame
+    block = odds_block(frame)
+    probabilities = consensus(block)
+    priced = ~np.isnan(probabilities).any(axis=1)
+    with warnings.catch_warnings():
+        warnings.simplefilter('ignore', RuntimeWarning)
+        margin = np.nanmean(margins(block), axis=1)
+    favourite = np.argmax(np.where(priced[:, None], probabilities, -np.inf), axis=1)
+    actual = outcomes(frame)
+    result = pd.DataFrame({'match_id': frame['id'].to_numpy(),
+                           'league_id': frame['league_id'].to_numpy(),
+                           'season': frame['season'].to_numpy()})
+    for position, outcome in enumerate(OUTCOMES):
+        result['prob_' + outcome] = probabilities[:, position]
+        result['odds_' + outcome] = 1.0 / probabilities[:, position]
+    result['margin'] = margin
+    result['favourite'] = pd.Categorical.from_codes(np.where(priced, favourite, -1), categories=OUTCOMES)
+    result['outcome'] = pd.Categorical.from_codes(actual, categories=OUTCOMES)
+    result['favourite_won'] = np.where(priced, favourite == actual, np.nan)
+    result['outcome_prob'] = probabilities[np.arange(len(frame)), actual]
+    return result
+
+
+def league_season_odds(per_match=None, database=DATABASE, cache_dir=CACHE_DIR):
+    """Margin, favourite accuracy and Brier-style fit per league and season."""
+    per_match = match_odds() if per_match is None else per_match
+    priced = per_match.dropna(subset=['prob_H'])
+    probabilities = priced[['prob_' + outcome for outcome in OUTCOMES]].to_numpy()
+    actual = np.eye(len(OUTCOMES))[priced['outcome'].cat.codes.to_numpy()]
+    priced = priced.assign(brier=((probabilities - actual) ** 2).sum(axis=1))
+    summary = priced.groupby(['league_id', 'season'], observed=True).agg(
+        matches=('match_id', 'size'), margin=('margin', 'mean'),
+        favourite_accuracy=('favourite_won', 'mean'), outcome_prob=('outcome_prob', 'mean'),
+        brier=('brier', 'mean')).round(4).reset_index()
+    league = load_table('League', ['id', 'name'], database, cache_dir).set_index('id')['name']
+    summary.insert(0, 'league_name', summary['league_id'].map(league))
+    return summary
+
+
+def bookmaker_margins(frame=None):
+    """Average margin and number of priced matches per bookmaker."""
+    frame = load_odds() if frame is None else frame
+    overround = margins(odds_block(frame))
+    with warnings.catch_warnings():
+        warnings.simplefilter('ignore', RuntimeWarning)
+        mean = np.nanmean(overround, axis=0)
+    return pd.DataFrame({'bookmaker': BOOKMAKERS, 'matches': (~np.isnan(overround)).sum(axis=0),
+                         'margin': mean.round(4)})
@@ -0,0 +1,151 @@
+"""Teammate partnerships: how often two players lined up on the same side.
+
+``pair_counts`` takes every pair of the 11 home (and the 11 away) lineup
+slots of every match in one vectorized pass and counts each unordered
+player pair per season and team with ``np.unique``, so the long
+one-row-per-appearance table is never built. Those counts are persisted in
+the data cache; ``co_appearances`` turns them, optionally restricted to some
+seasons and/or teams, into a symmetric ``scipy.sparse`` player x player
+matrix, built once per selection and kept in memory. Queries on the matrix
+(``top_partnerships``, ``common_teammates``) are a slice or a triangle of it
+and take milliseconds.
+"""
+import collections
+import functools
+
+import numpy as np
+import pandas as pd
+from scipy import sparse
+
+from soccer.analysis import lineups, player_names
+from soccer.appearances import HOME_SLOTS
+from soccer.query import LINEUP_COLUMNS
+from soccer.store import CACHE_DIR, DATABASE, load_derived
+from soccer.topk import top_k
+
+# matrix: symmetric CSR of matches played together; player_ids: the
+# player_api_id of each row/column, ascending
+Partnerships = collections.namedtuple('Partnerships', ['matrix', 'player_ids'])
+
+_FIRST, _SECOND = np.triu_indices(HOME_SLOTS, 1)
+
+
+def pair_counts(frame):
+    """Matches played together per season, team and player pair.
+
+    ``frame`` holds ``season``, ``home_team_api_id``, ``away_team_api_id``
+    and the 22 lineup columns. Each pair appears once, with
+    ``player_api_id < teammate_api_id``.
+    """
+    block = frame[LINEUP_COLUMNS].to_numpy(dtype='float64')
+    present = ~np.isnan(block)
+    player_ids = np.unique(block[present]).astype('int32')
+    codes = np.full(block.shape, -1, dtype='int64')
+    codes[present] = np.searchsorted(player_ids, block[present])
+
+    season_codes, seasons = pd.factorize(frame['season'], sort=True)
+    team_ids, team_codes = np.unique(np.concatenate([frame['home_team_api_id'].to_numpy(),
+                                                     frame['away_team_api_id'].to_numpy()]), return_inverse=True)
+    sides = [(codes[:, :HOME_SLOTS], team_codes[:len(frame)]), (codes[:, HOME_SLOTS:], team_codes[len(frame):])]
+
+    keys = []
+    for side, teams in sides:
+        first, second = side[:, _FIRST], side[:, _SECOND]
+        valid = (first >= 0) & (second >= 0) & (first != second)
+        matches = np.nonzero(valid)[0]
+        keys.append((season_codes[matches], teams[matches],
+                     np.minimum(first, second)[valid], np.maximum(first, second)[valid]))
+    dims = (len(seasons), len(team_ids), len(player_ids), len(player_ids))
+    flat, counts = np.unique(np.concatenate([np.ravel_multi_index(key, dims) for key in keys]), return_counts=True)
+    season, team, player, teammate = np.unravel_index(flat, dims)
+    pairs = pd.DataFrame({'season': np.asarray(seasons)[season],
+                          'team_api_id': team_ids[team],
+                          'player_api_id': player_ids[player],
+                          'teammate_api_id': player_ids[teammate],
+                          'matches': counts.astype('int32')})
+    if isinstance(frame['season'].dtype, pd.CategoricalDtype):
+        pairs['season'] = pd.Categorical(pairs['season'], dtype=frame['season'].dtype)
+    return pairs
+
+
+def _build(database, cache_dir):
+    return pair_counts(lineups(database, cache_dir))
+
+
+@functools.lru_cache(maxsize=None)
+def partnership_pairs(database=DATABASE, cache_dir=CACHE_DIR):
+    """The persisted pair counts, recounted when Match is re-extracted or their code changes."""
+    return load_derived('partnerships', functools.partial(_build, database, cache_dir),
+                        ['Match'], database, cache_dir)
+
+
+def _selection(values):
+    """``values`` as a sorted tuple (None: everything); a str is one value."""
+    if values is None:
+        return None
+    if isinstance(values, str) or not pd.api.types.is_list_like(values):
+        values = [values]
+    return tuple(sorted(values))
+
+
+def co_appearances(pairs=None, seasons=None, teams=None):
+    """``Partnerships`` over the pairs of ``seasons`` and ``teams`` (all by default).
+
+    ``seasons`` and ``teams`` are one value or a list of them; counts of a
+    pair from several seasons or teams are summed. Without ``pairs`` the
+    persisted pair counts are used and the matrix of each selection is built
+    once and shared between calls, so do not modify it.
+    """
+    seasons, teams = _selection(seasons), _selection(teams)
+    if pairs is None:
+        return _persisted(seasons, teams)
+    if seasons is not None:
+        pairs = pairs[pairs['season'].isin(seasons)]
+    if teams is not None:
+        pairs = pairs[pairs['team_api_id'].isin(teams)]
+    players = pairs['player_api_id'].to_numpy()
+    teammates = pairs['teammate_api_id'].to_numpy()
+    player_ids = np.union1d(players, teammates)
+    shape = (len(player_ids), len(player_ids))
+    upper = sparse.coo_matrix((pairs['matches'].to_numpy(),
+                               (np.searchsorted(player_ids, players), np.searchsorted(player_ids, teammates))),
+                              shape=shape).tocsr()
+    return Partnerships((upper + upper.T).tocsr(), player_ids)
+
+
+@functools.lru_cache(maxsize=8)
+def _persisted(seasons, teams):
+    return co_appearances(partnership_pairs(), seasons, teams)
+
+
+def _named(frame, names, columns):
+    names = player_names() if names is None else names
+    for column in columns:
+        frame.insert(frame.columns.get_loc(column) + 1, column.replace('_api_id', '_name'),
+                     frame[column].map(names))
+    return frame
+
+
+def top_partnerships(n=10, partnerships=None, names=None):
+    """The ``n`` player pairs that lined up together most often."""
+    partnerships = co_appearances() if partnerships is None else partnerships
+    upper = sparse.triu(partnerships.matrix, k=1).tocoo()
+    frame = pd.DataFrame({'player_api_id': partnerships.player_ids[upper.row],
+                          'teammate_api_id': partnerships.player_ids[upper.col],
+                          'matches': upper.data})
+    top = top_k(frame, 'matches', n).reset_index(drop=True)
+    return _named(top, names, ['player_api_id', 'teammate_api_id'])
+
+
+def common_teammates(player_api_id, n=10, partnerships=None, names=None):
+    """The ``n`` players ``player_api_id`` lined up with most often."""
+    partnerships = co_appearances() if partnerships is None else partnerships
+    position = np.searchsorted(partnerships.player_ids, player_api_id)
+    if position == len(partnerships.player_ids) or partnerships.player_ids[position] != player_api_id:
+        raise KeyError('no teammates of player {}'.format(player_api_id))
+    matrix = partnerships.matrix
+    start, end = matrix.indptr[position], matrix.indptr[position + 1]
+    frame = pd.DataFrame({'teammate_api_id': partnerships.player_ids[matrix.indices[start:end]],
+                          'matches': matrix.data[start:end]})
+    top = top_k(frame, 'matches', n).reset_index(drop=True)
+    return _named(top, names, ['teammate_api_id'])
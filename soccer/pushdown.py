@@ -0,0 +1,142 @@
+"""Questions answered inside SQLite instead of in pandas.
+
+The goal and win questions are plain GROUP BYs over Match, keyed on the
+team IDs, so SQLite can answer them (faster still with the opt-in
+``create_indexes`` on the Match keys) and only the aggregated rows reach
+pandas. A query joins only the Team/League
+tables whose names it returns, and LEFT JOINs them, so a match whose team
+or league row is missing still counts (under a NULL name) as in pandas.
+Each query returns the same columns, row order and tie order as the pandas
+version of the question (``report.check_backends`` verifies this), so the
+two backends are interchangeable per run.
+"""
+import sqlite3
+
+import pandas as pd
+
+from soccer.store import DATABASE
+
+INDEXES = {
+    'idx_match_season': ('Match', 'season'),
+    'idx_match_league_id': ('Match', 'league_id'),
+    'idx_match_home_team_api_id': ('Match', 'home_team_api_id'),
+    'idx_match_away_team_api_id': ('Match', 'away_team_api_id'),
+}
+
+# one row per team per match, as analysis.team_matches
+_SIDES = '''
+    WITH sides AS (
+        SELECT season, league_id, home_team_api_id AS team_api_id,
+               home_team_goal AS goals, home_team_goal > away_team_goal AS won
+        FROM Match
+        UNION ALL
+        SELECT season, league_id, away_team_api_id,
+               away_team_goal, away_team_goal > home_team_goal
+        FROM Match
+    )
+'''
+
+_VENUE_WINS = '''
+    SELECT m.{side}_team_api_id AS team_api_id, t.team_long_name AS team, COUNT(*) AS {side}_wins
+    FROM Match m
+    LEFT JOIN Team t ON t.team_api_id = m.{side}_team_api_id
+    WHERE m.{side}_team_goal > m.{other}_team_goal
+    GROUP BY m.{side}_team_api_id, t.team_long_name
+    ORDER BY {side}_wins DESC, team_api_id
+'''
+
+QUERIES = {
+    'team_season_goals': _SIDES + '''
+        SELECT s.season, l.name AS league_name, s.team_api_id, t.team_long_name AS team,
+               CAST(SUM(s.goals) AS BIGINT) AS goals
+        FROM sides s
+        LEFT JOIN League l ON l.id = s.league_id
+        LEFT JOIN Team t ON t.team_api_id = s.team_api_id
+        GROUP BY s.season, l.name, s.team_api_id, t.team_long_name
+        ORDER BY goals DESC, s.season, l.name IS NULL, l.name, s.team_api_id
+    ''',
+    'team_goals': _SIDES + '''
+        SELECT s.team_api_id, t.team_long_name AS team, CAST(SUM(s.goals) AS BIGINT) AS goals
+        FROM sides s
+        LEFT JOIN Team t ON t.team_api_id = s.team_api_id
+        GROUP BY s.team_api_id, t.team_long_name
+        ORDER BY goals DESC, s.team_api_id
+    ''',
+    'season_goals': _SIDES + '''
+        SELECT s.season, CAST(SUM(s.goals) AS BIGINT) AS goals
+        FROM sides s
+        GROUP BY s.season
+        ORDER BY goals DESC, s.season
+    ''',
+    'league_goals': _SIDES + '''
+        SELECT l.name AS league_name, CAST(SUM(s.goals) AS BIGINT) AS goals
+        FROM sides s
+        LEFT JOIN League l ON l.id = s.league_id
+        GROUP BY l.name
+        ORDER BY goals DESC, l.name IS NULL, l.name
+    ''',
+    'best_teams': _SIDES + '''
+        SELECT s.team_api_id, t.team_long_name AS team, COUNT(*) AS wins
+        FROM sides s LEFT JOIN Team t ON t.team_api_id = s.team_api_id
+        WHERE s.won
+        GROUP BY s.team_api_id, t.team_long_name
+        ORDER BY wins DESC, s.team_api_id
+        LIMIT 10
+    ''',
+    'win_home_away': '''
+        SELECT l.name AS league_name,
+               CASE WHEN m.home_team_goal > m.away_team_goal THEN 'home_team'
+                    WHEN m.home_team_goal < m.away_team_goal THEN 'away_team'
+                    ELSE 'Draw' END AS winner,
+               COUNT(*) AS total
+        FROM Match m LEFT JOIN League l ON l.id = m.league_id
+        GROUP BY l.name, winner
+        ORDER BY l.name IS NULL, l.name, CASE winner WHEN 'home_team' THEN 0 WHEN 'away_team' THEN 1 ELSE 2 END
+    ''',
+    'home_wins': _VENUE_WINS.format(side='home', other='away'),
+    'away_wins': _VENUE_WINS.format(side='away', other='home'),
+}
+
+
+def create_indexes(database=DATABASE):
+    """Create the Match indexes the queries use; existing ones are kept.
+
+    This writes to ``database``, so the Parquet cache sees a changed file
+    and re-extracts once afterwards, and results cached from the old file
+    are not reused. Nothing calls it unless asked to (``sql_indexes``).
+    """
+    con = sqlite3.connect(database)
+    try:
+        existing = {row[0] for row in con.execute("SELECT name FROM sqlite_master WHERE type = 'index'")}
+        missing = [name for name in INDEXES if name not in existing]
+        for name in missing:
+            table, column = INDEXES[name]
+            con.execute('CREATE INDEX "{}" ON "{}" ("{}")'.format(name, table, column))
+        if missing:
+            con.execute('ANALYZE')
+        con.commit()
+    finally:
+        con.close()
+    return missing
+
+
+def run_queries(questions, database=DATABASE):
+    """``{question: DataFrame}`` for ``questions``, computed by SQLite."""
+    unknown = [question for question in questions if question not in QUERIES]
+    if unknown:
+        raise KeyError('no SQL for questions: {}'.format(unknown))
+    con = sqlite3.connect(database)
+    try:
+        return {question: pd.read_sql_query(QUERIES[question], con) for question in questions}
+    finally:
+        con.close()
+
+
+def same_result(expected, actual):
+    """True if two answers hold the same values in the same order, ignoring dtypes and index."""
+    try:
+        pd.testing.assert_frame_equal(expected.reset_index(drop=True), actual.reset_index(drop=True),
+                                      check_dtype=False, check_categorical=False)
+    except AssertionError:
+        return False
+    return True
@@ -0,0 +1,91 @@
+"""Narrow, filtered reads of the Match table straight from SQLite.
+
+Each analysis declares the Match columns it touches (see ``ANALYSIS_COLUMNS``)
+and optionally the seasons/leagues it cares about; ``read_match`` turns that
+into a projected ``SELECT ... WHERE`` so the odds columns and XML blobs never
+leave the database. With ``chunksize`` the rows are streamed, keeping peak
+memory proportional to the projection instead of the whole table.
+"""
+import sqlite3
+
+import pandas as pd
+
+from soccer.store import DATABASE, typed
+
+GOAL_COLUMNS = ['league_id', 'season', 'home_team_api_id', 'away_team_api_id',
+                'home_team_goal', 'away_team_goal']
+HOME_PLAYER_COLUMNS = ['home_player_{}'.format(i) for i in range(1, 12)]
+AWAY_PLAYER_COLUMNS = ['away_player_{}'.format(i) for i in range(1, 12)]
+LINEUP_COLUMNS = HOME_PLAYER_COLUMNS + AWAY_PLAYER_COLUMNS
+
+ANALYSIS_COLUMNS = {
+    'goals': GOAL_COLUMNS,
+    'appearances': LINEUP_COLUMNS,
+}
+
+
+def table_columns(con, table='Match'):
+    return [row[1] for row in con.execute('PRAGMA table_info("{}")'.format(table))]
+
+
+def _in_clause(column, values, params):
+    # a single season or league (a str is iterable, but one value)
+    if isinstance(values, str) or not pd.api.types.is_list_like(values):
+        values = [values]
+    values = list(values)
+    params.extend(values)
+    return '"{}" IN ({})'.format(column, ', '.join('?' * len(values)))
+
+
+def match_query(columns, seasons=None, leagues=None, known_columns=None):
+    """Build the SQL and bound parameters for a projected Match read.
+
+    ``known_columns`` (the real table columns) is used to reject unknown
+    names, since column identifiers cannot be passed as parameters.
+    """
+    columns = list(dict.fromkeys(columns))
+    if not columns:
+        raise ValueError('no columns requested')
+    if known_columns is not None:
+        unknown = [c for c in columns if c not in known_columns]
+        if unknown:
+            raise KeyError('unknown Match columns: {}'.format(unknown))
+    params = []
+    where = []
+    if seasons is not None:
+        where.append(_in_clause('season', seasons, params))
+    if leagues is not None:
+        where.append(_in_clause('league_id', leagues, params))
+    sql = 'SELECT {} FROM Match'.format(', '.join('"{}"'.format(c) for c in columns))
+    if where:
+        sql += ' WHERE ' + ' AND '.join(where)
+    return sql, params
+
+
+def _stream(database, sql, params, chunksize):
+    con = sqlite3.connect(database)
+    try:
+        for chunk in pd.read_sql_query(sql, con, params=params, chunksize=chunksize):
+            yield typed(chunk, 'Match')
+    finally:
+        con.close()
+
+
+def read_match(columns, seasons=None, leagues=None, database=DATABASE, chunksize=None):
+    """Read ``columns`` of Match for the given seasons/leagues.
+
+    ``columns`` is either a list of column names or the name of an entry in
+    ``ANALYSIS_COLUMNS``; ``seasons`` and ``leagues`` are one value or a list
+    of them. Returns a DataFrame, or an iterator of DataFrames
+    of at most ``chunksize`` rows when ``chunksize`` is given.
+    """
+    if isinstance(columns, str):
+        columns = ANALYSIS_COLUMNS[columns]
+    con = sqlite3.connect(database)
+    try:
+        sql, params = match_query(columns, seasons, leagues, table_columns(con))
+        if chunksize is None:
+            return typed(pd.read_sql_query(sql, con, params=params), 'Match')
+    finally:
+        con.close()
+    return _stream(database, sql, params, chunksize)
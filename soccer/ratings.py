@@ -0,0 +1,72 @@
+"""Per-player summary of the dated Player_Attributes snapshots.
+
+One vectorized pass over all snapshots, keyed on ``player_api_id``, gives
+the mean, max, latest and date-weighted mean of ``overall_rating`` and
+``potential``. Each snapshot is weighted by the number of days it stayed
+current (until the player's next snapshot, or the last snapshot date in the
+table), so a rating that held for two years counts more than one replaced a
+week later. The summary is persisted in the data cache, which turns the
+rating leaderboards into lookups on a ~11k-row table.
+"""
+import functools
+
+import numpy as np
+import pandas as pd
+
+from soccer.store import CACHE_DIR, DATABASE, load_derived, load_table
+from soccer.topk import top_k
+
+RATINGS = ['overall_rating', 'potential']
+
+
+def summarize_ratings(attributes):
+    """Summary table indexed by ``player_api_id`` from raw snapshots."""
+    attributes = attributes[['player_api_id', 'date'] + RATINGS].sort_values(['player_api_id', 'date'], kind='stable')
+    ids = attributes['player_api_id'].to_numpy()
+    dates = attributes['date'].to_numpy()
+
+    last_of_player = np.append(ids[1:] != ids[:-1], True)
+    next_dates = np.where(last_of_player, dates.max(), np.roll(dates, -1))
+    days = (next_dates - dates) / np.timedelta64(1, 'D')
+    weights = np.maximum(days, 1.0)
+
+    columns = {}
+    for rating in RATINGS:
+        values = attributes[rating].to_numpy(dtype='float64')
+        known = ~np.isnan(values)
+        columns[rating + '_weighted'] = np.where(known, values * weights, 0.0)
+        columns[rating + '_weight'] = np.where(known, weights, 0.0)
+    weighted = pd.DataFrame(columns, index=attributes.index).groupby(ids).sum()
+
+    grouped = attributes.groupby('player_api_id')
+    summary = pd.DataFrame({'snapshots': grouped.size(),
+                            'first_date': grouped['date'].min(),
+                            'last_date': grouped['date'].max()})
+    for rating in RATINGS:
+        summary[rating + '_mean'] = grouped[rating].mean()
+        summary[rating + '_max'] = grouped[rating].max()
+        summary[rating + '_latest'] = grouped[rating].last()
+        summary[rating + '_weighted'] = (weighted[rating + '_weighted']
+                                         / weighted[rating + '_weight'].replace(0.0, np.nan)).to_numpy()
+    return summary
+
+
+def _build(database, cache_dir):
+    attributes = load_table('Player_Attributes', ['player_api_id', 'date'] + RATINGS, database, cache_dir)
+    return summarize_ratings(attributes)
+
+
+@functools.lru_cache(maxsize=None)
+def rating_summary(database=DATABASE, cache_dir=CACHE_DIR):
+    """The persisted rating summary, rebuilt when the snapshots or its code change."""
+    return load_derived('player_ratings', functools.partial(_build, database, cache_dir),
+                        ['Player_Attributes'], database, cache_dir)
+
+
+def leaderboard(column='overall_rating_mean', n=10, summary=None, names=None):
+    """Top ``n`` players by a summary ``column``, with their names."""
+    summary = rating_summary() if summary is None else summary
+    top = top_k(summary[[column]], column, n)
+    if names is not None:
+        top.insert(0, 'player_name', top.index.map(names))
+    return top
@@ -0,0 +1,205 @@
+"""The notebook's questions as a task graph, written out as CSV files.
+
+Base frames (``facts``, ``players``, ``lineups``, ...) are nodes of their
+own, so each is built once and shared by every question that declares it
+as an input. They declare the tables they load, so their cached results
+are keyed on those tables alone. ``run_report`` runs the graph through
+``soccer.dag``.
+"""
+import contextlib
+import functools
+import os
+
+import pandas as pd
+
+from soccer import analysis, duck, elo, odds, pushdown, standings, venues
+from soccer.dag import Task, run
+from soccer.results import ResultCache
+from soccer.store import CACHE_DIR, DATABASE, table_fingerprints
+
+
+def _end(position, ends):
+    """One side of a ``(smallest, largest)`` pair from ``topk.both_ends``."""
+    return ends[position]
+
+
+def tasks(database=DATABASE, cache_dir=CACHE_DIR):
+    """All nodes of the report graph for the given database/cache."""
+    source = functools.partial
+    return [
+        # base frames
+        Task('facts', source(analysis.match_facts, database, cache_dir), tables=['Match', 'League']),
+        Task('players', source(analysis.players, database, cache_dir), tables=['Player']),
+        Task('player_names', analysis.player_names, {'frame': 'players'}),
+        Task('team_names', source(analysis.team_names, database, cache_dir), tables=['Team']),
+        Task('lineups', source(analysis.lineups, database, cache_dir), tables=['Match']),
+        Task('player_ratings', source(analysis.player_ratings, database, cache_dir),
+             tables=['Player_Attributes']),
+        Task('team_attributes', source(analysis.team_attributes, database, cache_dir), tables=['Team_Attributes']),
+        Task('odds', source(odds.load_odds, database, cache_dir), tables=['Match']),
+        Task('team_season_goals', analysis.team_season_goals, {'facts': 'facts', 'names': 'team_names'}),
+        Task('team_results', standings.team_results, {'facts': 'facts'}),
+        # questions
+        Task('player_ages', analysis.oldest_and_youngest_players, {'frame': 'players'}),
+        Task('player_heights', analysis.shortest_and_tallest_players, {'frame': 'players'}),
+        Task('oldest_players', functools.partial(_end, 0), {'ends': 'player_ages'}),
+        Task('youngest_players', functools.partial(_end, 1), {'ends': 'player_ages'}),
+        Task('shortest_players', functools.partial(_end, 0), {'ends': 'player_heights'}),
+        Task('tallest_players', functools.partial(_end, 1), {'ends': 'player_heights'}),
+        Task('top_players', analysis.top_players, {'ratings': 'player_ratings', 'names': 'player_names'}),
+        Task('top_players_potential', analysis.top_players_potential,
+             {'ratings': 'player_ratings', 'names': 'player_names'}),
+        Task('appearances', analysis.appearances, {'frame': 'lineups', 'names': 'player_names'}),
+        Task('team_goals', analysis.team_goals, {'season_goals': 'team_season_goals', 'names': 'team_names'}),
+        Task('season_goals', analysis.season_goals, {'season_goals': 'team_season_goals'}),
+        Task('league_goals', analysis.league_goals, {'season_goals': 'team_season_goals'}),
+        Task('team_improve', analysis.team_improve, {'season_goals': 'team_season_goals', 'names': 'team_names'}),
+        Task('standings', standings.standings, {'results': 'team_results', 'names': 'team_names'}),
+        Task('elo_ratings', elo.elo_ratings, {'facts': 'facts'}),
+        Task('elo_history', elo.rating_history, {'ratings': 'elo_ratings'}),
+        Task('elo_improve', elo.elo_improvement, {'history': 'elo_history', 'team_names': 'team_names'}),
+        Task('best_teams', analysis.best_teams, {'facts': 'facts', 'names': 'team_names'}),
+        Task('best_teams_attr', analysis.best_teams_attr,
+             {'facts': 'facts', 'attributes': 'team_attributes', 'names': 'team_names'}),
+        Task('attributes_at_matches', source(analysis.team_attributes_at_matches, database=database,
+                                             cache_dir=cache_dir), {'facts': 'facts'}, ['Team_Attributes']),
+        Task('winning_team_attributes', analysis.winning_team_attributes,
+             {'facts': 'facts', 'at_match': 'attributes_at_matches'}),
+        Task('win_home_away', analysis.win_home_away, {'facts': 'facts'}),
+        Task('bookmaker_margins', odds.bookmaker_margins, {'frame': 'odds'}),
+        Task('venue_records', venues.venue_records, {'results': 'team_results'}),
+        Task('home_wins', venues.home_wins, {'records': 'venue_records', 'names': 'team_names'}),
+        Task('away_wins', venues.away_wins, {'records': 'venue_records', 'names': 'team_names'}),
+        Task('home_advantage', venues.home_advantage, {'records': 'venue_records'}),
+    ]
+
+
+# question node -> output file, named as in the notebook where it wrote one
+OUTPUTS = {
+    'oldest_players': 'oldest_player.csv',
+    'youngest_players': 'youngest_player.csv',
+    'shortest_players': 'shortest_player.csv',
+    'tallest_players': 'tallest_player.csv',
+    'top_players': 'top_players.csv',
+    'top_players_potential': 'top_players_potential.csv',
+    'appearances': 'player_most_appearances.csv',
+    'team_season_goals': 'team_season_goals.csv',
+    'team_goals': 'team_goals.csv',
+    'season_goals': 'season_goals.csv',
+    'league_goals': 'league_goals.csv',
+    'team_improve': 'team_improve.csv',
+    'standings': 'standings.csv',
+    'elo_improve': 'elo_improve.csv',
+    'best_teams': 'best_teams.csv',
+    'best_teams_attr': 'best_teams_attr.csv',
+    'winning_team_attributes': 'winning_team_attributes.csv',
+    'win_home_away': 'win_home_away.csv',
+    'home_wins': 'home_wins.csv',
+    'away_wins': 'away_wins.csv',
+    'home_advantage': 'home_advantage.csv',
+    'bookmaker_margins': 'bookmaker_margins.csv',
+}
+
+QUESTIONS = list(OUTPUTS)
+
+BACKENDS = ['pandas', 'sql', 'duckdb']
+
+
+def write_output(frame, path):
+    """Write a question's table; the index is kept only when it is named."""
+    frame.to_csv(path, index=any(name is not None for name in frame.index.names))
+
+
+def _untraced(name, inputs=None):
+    return contextlib.nullcontext()
+
+
+def backend_engine(backend, database, cache_dir, step=_untraced, sql_indexes=False):
+    """``(queries, answer)`` of the engine behind ``backend``; no queries for pandas.
+
+    ``sql_indexes`` first writes the ``pushdown.INDEXES`` into ``database``.
+    """
+    if backend == 'sql':
+        if sql_indexes:
+            with step('indexes'):
+                pushdown.create_indexes(database)
+        return pushdown.QUERIES, functools.partial(pushdown.run_queries, database=database)
+    if backend == 'duckdb':
+        return duck.QUERIES, functools.partial(duck.run_queries, database=database, cache_dir=cache_dir)
+    return {}, None
+
+
+def _check_questions(questions):
+    questions = QUESTIONS if questions is None else list(questions)
+    unknown = [question for question in questions if question not in OUTPUTS]
+    if unknown:
+        raise KeyError('unknown questions: {}'.format(unknown))
+    return questions
+
+
+def run_report(questions=None, output_dir='.', database=DATABASE, cache_dir=CACHE_DIR, workers=None,
+               use_cache=True, tracer=None, backend='pandas', figures_dir=None,
+               figure_formats=('png',), sql_indexes=False):
+    """Answer ``questions`` (all by default) and write their CSV files.
+
+    With ``use_cache`` results are memoized under ``<cache_dir>/results``
+    keyed by the database content and each node's code, so only questions
+    whose inputs or code changed are recomputed. A ``trace.Tracer`` records
+    the extraction, every node that runs and every write. With
+    ``backend='sql'`` the questions in ``pushdown.QUERIES`` are answered by
+    SQLite, with ``backend='duckdb'`` those in ``duck.QUERIES`` by DuckDB,
+    and only the rest go through the pandas graph. ``sql_indexes`` lets the
+    sql backend add its indexes to the database file first; that changes
+    the file, so the Parquet cache is re-extracted once. With ``figures_dir``
+    the charts of the answers (including the per-league and per-season
+    ones) are drawn on ``workers`` processes into ``figures_dir`` in every
+    one of ``figure_formats`` (only then is matplotlib imported). Returns
+    ``{question: csv path}``.
+    """
+    if backend not in BACKENDS:
+        raise ValueError('unknown backend: {}'.format(backend))
+    step = _untraced if tracer is None else tracer.span
+    questions = _check_questions(questions)
+    queries, answer = backend_engine(backend, database, cache_dir, step, sql_indexes)
+    pushed = [question for question in questions if question in queries]
+    results = {}
+    for question in pushed:
+        with step('{}:{}'.format(backend, question)) as query:
+            results.update(answer([question]))
+            if tracer is not None:
+                query.output = results[question]
+    remaining = [question for question in questions if question not in pushed]
+    if remaining:
+        # extract once up front rather than racing to build the cache in every worker
+        with step('extract'):
+            tables = table_fingerprints(database, cache_dir)
+        cache = ResultCache(os.path.join(cache_dir, 'results')) if use_cache else None
+        results.update(run(tasks(database, cache_dir), remaining, workers, cache, tracer=tracer, tables=tables))
+    os.makedirs(output_dir, exist_ok=True)
+    paths = {}
+    for question in questions:
+        paths[question] = os.path.join(output_dir, OUTPUTS[question])
+        frame = pd.DataFrame(results[question])
+        with step('write:' + question, {'frame': frame}):
+            write_output(frame, paths[question])
+    if figures_dir is not None:
+        from soccer import figures
+        with step('figures'):
+            figures.render_all({question: pd.DataFrame(results[question]) for question in questions}, figures_dir,
+                               figure_formats, workers)
+    if tracer is not None:
+        tracer.close()
+    return paths
+
+
+def check_backends(questions=None, database=DATABASE, cache_dir=CACHE_DIR, backend='sql'):
+    """``{question: True/False}``: does ``backend``'s answer equal the pandas one?
+
+    Covers the ``questions`` (default: all) that ``backend`` can answer.
+    """
+    queries, answer = backend_engine(backend, database, cache_dir)
+    questions = [question for question in _check_questions(questions) if question in queries]
+    expected = run(tasks(database, cache_dir), questions, workers=1)
+    actual = answer(questions)
+    return {question: pushdown.same_result(pd.DataFrame(expected[question]), actual[question])
+            for question in questions}
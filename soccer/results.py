@@ -0,0 +1,97 @@
+"""Content-addressed, size-bounded cache of task results.
+
+A task's key hashes its name, the version of the code its function runs
+(``versions.code_version``: its own source plus the package functions and
+constants it references, and any bound ``functools.partial`` arguments),
+the content fingerprints of the tables it loads (base nodes) and the keys
+of its inputs (everything downstream). Editing a question or any helper it
+reaches therefore changes that node's key, and anything downstream of it,
+but no other node's; so does a change to a table only for the nodes built
+from it. Entries
+are pickled under ``cache/results/`` and evicted least-recently-used first
+once the directory grows past ``max_bytes``.
+"""
+import hashlib
+import os
+import pickle
+
+from soccer.store import CACHE_DIR
+from soccer.versions import code_version
+
+MISSING = object()
+
+
+def task_key(task, input_keys, salt='', tables=None):
+    """Key of ``task`` given the keys of the tasks feeding its arguments.
+
+    ``tables`` maps table names to fingerprints (``store.table_fingerprints``)
+    and must cover every table ``task`` declares.
+    """
+    tables = {} if tables is None else tables
+    missing = [table for table in task.tables if table not in tables]
+    if missing:
+        raise KeyError('no fingerprint of tables {} loaded by {}'.format(missing, task.name))
+    parts = [salt, task.name, code_version(task.func)]
+    parts += ['{}@{}'.format(table, tables[table]) for table in task.tables]
+    parts += ['{}={}'.format(argument, input_keys[argument]) for argument in sorted(input_keys)]
+    return hashlib.sha1('\n'.join(parts).encode()).hexdigest()
+
+
+class ResultCache:
+    """Pickled results keyed by ``task_key``, bounded to ``max_bytes`` on disk."""
+
+    def __init__(self, path=os.path.join(CACHE_DIR, 'results'), max_bytes=256 * 2 ** 20):
+        self.path = path
+        self.max_bytes = max_bytes
+
+    def _file(self, key):
+        return os.path.join(self.path, key + '.pkl')
+
+    def __contains__(self, key):
+        return os.path.exists(self._file(key))
+
+    def get(self, key):
+        """The cached value for ``key``, or ``MISSING``; a hit marks it recently used."""
+        path = self._file(key)
+        try:
+            with open(path, 'rb') as f:
+                value = pickle.load(f)
+        except FileNotFoundError:
+            return MISSING
+        os.utime(path)
+        return value
+
+    def put(self, key, value):
+        os.makedirs(self.path, exist_ok=True)
+        path = self._file(key)
+        # unique temp name: several workers may store results concurrently
+        temp = '{}.{}.tmp'.format(path, os.getpid())
+        with open(temp, 'wb') as f:
+            pickle.dump(value, f, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(temp, path)
+        self.evict()
+
+    def evict(self):
+        """Drop least recently used entries until the cache fits ``max_bytes``."""
+        entries = []
+        for entry in os.scandir(self.path):
+            if entry.name.endswith('.pkl'):
+                try:
+                    stat = entry.stat()
+                except FileNotFoundError:
+                    continue
+                entries.append((stat.st_mtime, stat.st_size, entry.path))
+        total = sum(size for _, size, _ in entries)
+        for _, size, path in sorted(entries):
+            if total <= self.max_bytes:
+                break
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
+            total -= size
+
+    def clear(self):
+        if os.path.isdir(self.path):
+            for entry in os.scandir(self.path):
+                os.remove(entry.path)
@@ -0,0 +1,82 @@
+"""League tables built from one stacked home/away pass over the matches.
+
+``team_results`` turns every match into two rows, one per team, with goals
+for/against and the W/D/L outcome from that team's side. A final table is a
+single groupby over those rows; standings after every matchday are the same
+rows accumulated with ``cumsum`` per team, so no per-date loop is needed.
+Ranking uses points, then goal difference, then goals scored. Teams are
+keyed by ``team_api_id`` throughout; names are added to the finished tables.
+Matches whose league row is missing are kept, in a table of their own with
+a NaN ``league_name``, as in ``venues`` and the SQL backend.
+"""
+import numpy as np
+import pandas as pd
+
+from soccer.analysis import match_facts, with_team_names
+
+POINTS = {'won': 3, 'drawn': 1, 'lost': 0}
+TABLE_KEYS = ['league_name', 'season', 'team_api_id']
+COUNT_COLUMNS = ['played', 'won', 'drawn', 'lost', 'goals_for', 'goals_against', 'points']
+ORDER = ['points', 'goal_difference', 'goals_for']
+
+
+def team_results(facts=None):
+    """One row per team per match with its goals and outcome."""
+    facts = match_facts() if facts is None else facts
+    home_goals = facts['home_team_goal'].to_numpy(dtype='int64')
+    away_goals = facts['away_team_goal'].to_numpy(dtype='int64')
+    goals_for = np.concatenate([home_goals, away_goals])
+    goals_against = np.concatenate([away_goals, home_goals])
+    won = goals_for > goals_against
+    drawn = goals_for == goals_against
+    lost = goals_for < goals_against
+    results = pd.concat([facts[['match_id', 'date', 'stage', 'league_name', 'season']]] * 2, ignore_index=True)
+    results['team_api_id'] = np.concatenate([facts['home_team_api_id'].to_numpy(),
+                                             facts['away_team_api_id'].to_numpy()])
+    results['home'] = np.repeat([True, False], len(facts))
+    results['played'] = 1
+    results['won'] = won.astype('int64')
+    results['drawn'] = drawn.astype('int64')
+    results['lost'] = lost.astype('int64')
+    results['goals_for'] = goals_for
+    results['goals_against'] = goals_against
+    results['points'] = POINTS['won'] * results['won'] + POINTS['drawn'] * results['drawn']
+    return results
+
+
+def _ranked(table, keys):
+    """``table`` ordered within ``keys`` by ``ORDER`` with a 1-based ``rank``."""
+    table = table.assign(goal_difference=table['goals_for'] - table['goals_against'])
+    table = table.sort_values(keys + ORDER, ascending=[True] * len(keys) + [False] * len(ORDER),
+                              kind='stable', ignore_index=True)
+    table.insert(len(keys), 'rank', table.groupby(keys, observed=True, dropna=False).cumcount() + 1)
+    return table
+
+
+def standings(facts=None, results=None, names=None):
+    """Final table of every league and season."""
+    results = team_results(facts) if results is None else results
+    table = results.groupby(TABLE_KEYS, observed=True, dropna=False, as_index=False)[COUNT_COLUMNS].sum()
+    return with_team_names(_ranked(table, ['league_name', 'season']), names)
+
+
+def matchday_standings(facts=None, results=None, names=None):
+    """The table of every league and season after each of its matchdays (``stage``).
+
+    Every team of a league season has a row at every matchday; a team that
+    did not play on one keeps its previous totals.
+    """
+    results = team_results(facts) if results is None else results
+    results = results.sort_values(TABLE_KEYS + ['stage', 'date'], kind='stable', ignore_index=True)
+    running = results[TABLE_KEYS + ['stage']].join(
+        results.groupby(TABLE_KEYS, observed=True, dropna=False)[COUNT_COLUMNS].cumsum())
+    running = running.groupby(TABLE_KEYS + ['stage'], observed=True, dropna=False, as_index=False).tail(1)
+
+    teams = running[TABLE_KEYS].drop_duplicates()
+    stages = running[['league_name', 'season', 'stage']].drop_duplicates()
+    grid = teams.merge(stages, on=['league_name', 'season'])
+    table = grid.merge(running, on=TABLE_KEYS + ['stage'], how='left')
+    table = table.sort_values(TABLE_KEYS + ['stage'], kind='stable', ignore_index=True)
+    filled = table.groupby(TABLE_KEYS, observed=True, dropna=False)[COUNT_COLUMNS].ffill()
+    table[COUNT_COLUMNS] = filled.fillna(0).astype('int64')
+    return with_team_names(_ranked(table, ['league_name', 'season', 'stage']), names)
@@ -0,0 +1,264 @@
+"""Columnar cache of the tables in database.sqlite.
+
+Every table is extracted once into its own Parquet file under ``cache/``.
+The cache is only rebuilt when the SQLite file changes, and tables are read
+back with just the columns an analysis asks for.
+"""
+import functools
+import hashlib
+import json
+import os
+import sqlite3
+
+import numpy as np
+import pandas as pd
+
+from soccer.versions import code_version
+
+DATABASE = 'database.sqlite'
+CACHE_DIR = 'cache'
+MANIFEST = 'manifest.json'
+# bump whenever extraction changes the stored types, so stale caches rebuild
+CACHE_VERSION = 4
+
+TABLES = ['Country', 'League', 'Match', 'Player', 'Player_Attributes', 'Team', 'Team_Attributes']
+
+# stored dtype of every column, applied when a table is read out of SQLite:
+# int32 ids, int8/int16 small counts, float32 ratings, heights and odds,
+# categoricals for repetitive labels and parsed timestamps. An integer
+# column that turns out to hold NULLs gets the nullable counterpart
+# ('int32' -> 'Int32'), and one whose values do not fit the next wider
+# integer type that holds them ('int8' -> 'int16'); columns declared
+# nullable hold NULLs in the Kaggle database. Text not listed as a category
+# stays a plain string.
+DATE = 'datetime'
+TEXT = 'str'
+INTEGERS = ['int8', 'int16', 'int32', 'int64']
+
+
+def _numbered(pattern, dtype, sides=('home', 'away')):
+    return {pattern.format(side=side, i=i): dtype for side in sides for i in range(1, 12)}
+
+
+SCHEMA = {
+    'Country': {'id': 'int32', 'name': 'category'},
+    'League': {'id': 'int32', 'country_id': 'int32', 'name': 'category'},
+    'Team': {'id': 'int32', 'team_api_id': 'int32', 'team_fifa_api_id': 'Int32', 'team_long_name': 'category',
+             'team_short_name': 'category'},
+    'Player': {'id': 'int32', 'player_api_id': 'int32', 'player_name': 'category', 'player_fifa_api_id': 'int32',
+               'birthday': DATE, 'height': 'float32', 'weight': 'int16'},
+    'Player_Attributes': dict(
+        {'id': 'int32', 'player_fifa_api_id': 'int32', 'player_api_id': 'int32', 'date': DATE,
+         'overall_rating': 'float32', 'potential': 'float32', 'preferred_foot': 'category',
+         'attacking_work_rate': 'category', 'defensive_work_rate': 'category'},
+        **{column: 'float32' for column in [
+            'crossing', 'finishing', 'heading_accuracy', 'short_passing', 'volleys', 'dribbling', 'curve',
+            'free_kick_accuracy', 'long_passing', 'ball_control', 'acceleration', 'sprint_speed', 'agility',
+            'reactions', 'balance', 'shot_power', 'jumping', 'stamina', 'strength', 'long_shots', 'aggression',
+            'interceptions', 'positioning', 'vision', 'penalties', 'marking', 'standing_tackle', 'sliding_tackle',
+            'gk_diving', 'gk_handling', 'gk_kicking', 'gk_positioning', 'gk_reflexes']}),
+    'Team_Attributes': {
+        'id': 'int32', 'team_fifa_api_id': 'int32', 'team_api_id': 'int32', 'date': DATE,
+        'buildUpPlaySpeed': 'int8', 'buildUpPlaySpeedClass': 'category',
+        'buildUpPlayDribbling': 'Int8', 'buildUpPlayDribblingClass': 'category',
+        'buildUpPlayPassing': 'int8', 'buildUpPlayPassingClass': 'category',
+        'buildUpPlayPositioningClass': 'category',
+        'chanceCreationPassing': 'int8', 'chanceCreationPassingClass': 'category',
+        'chanceCreationCrossing': 'int8', 'chanceCreationCrossingClass': 'category',
+        'chanceCreationShooting': 'int8', 'chanceCreationShootingClass': 'category',
+        'chanceCreationPositioningClass': 'category',
+        'defencePressure': 'int8', 'defencePressureClass': 'category',
+        'defenceAggression': 'int8', 'defenceAggressionClass': 'category',
+        'defenceTeamWidth': 'int8', 'defenceTeamWidthClass': 'category',
+        'defenceDefenderLineClass': 'category',
+    },
+    'Match': dict(
+        {'id': 'int32', 'country_id': 'int32', 'league_id': 'int32', 'season': 'category', 'stage': 'int8',
+         'date': DATE, 'match_api_id': 'int32', 'home_team_api_id': 'int32', 'away_team_api_id': 'int32',
+         'home_team_goal': 'int8', 'away_team_goal': 'int8'},
+        **_numbered('{side}_player_X{i}', 'Int8'),
+        **_numbered('{side}_player_Y{i}', 'Int8'),
+        **_numbered('{side}_player_{i}', 'Int32'),
+        **{column: TEXT for column in ['goal', 'shoton', 'shotoff', 'foulcommit', 'card', 'cross', 'corner',
+                                       'possession']},
+        **{bookmaker + outcome: 'float32' for bookmaker in ['B365', 'BW', 'IW', 'LB', 'PS', 'WH', 'SJ', 'VC',
+                                                             'GB', 'BS']
+           for outcome in 'HDA'}),
+}
+
+# text columns holding timestamps, parsed once at extraction time
+DATE_COLUMNS = {name: [column for column, dtype in SCHEMA[name].items() if dtype == DATE]
+                for name in TABLES if DATE in SCHEMA[name].values()}
+
+
+def _file_hash(path, block_size=1 << 20):
+    digest = hashlib.sha1()
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(block_size), b''):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def _read_manifest(cache_dir):
+    path = os.path.join(cache_dir, MANIFEST)
+    if not os.path.exists(path):
+        return None
+    with open(path) as f:
+        return json.load(f)
+
+
+def _write_manifest(cache_dir, manifest):
+    path = os.path.join(cache_dir, MANIFEST)
+    with open(path + '.tmp', 'w') as f:
+        json.dump(manifest, f, indent=2)
+    os.replace(path + '.tmp', path)
+
+
+def table_path(name, cache_dir=CACHE_DIR):
+    return os.path.join(cache_dir, name.lower() + '.parquet')
+
+
+def is_fresh(database=DATABASE, cache_dir=CACHE_DIR):
+    """Return True if the cache matches the current database file.
+
+    The cheap mtime/size check decides in the common case; the content hash
+    is only computed when the file was touched, so a copied or re-saved but
+    identical database does not trigger a rebuild.
+    """
+    manifest = _read_manifest(cache_dir)
+    if (manifest is None or manifest.get('version') != CACHE_VERSION or manifest['tables'] != TABLES
+            or 'table_sha1' not in manifest):
+        return False
+    if not all(os.path.exists(table_path(name, cache_dir)) for name in TABLES):
+        return False
+    stat = os.stat(database)
+    if manifest['mtime'] == stat.st_mtime and manifest['size'] == stat.st_size:
+        return True
+    if manifest['size'] != stat.st_size or manifest['sha1'] != _file_hash(database):
+        return False
+    manifest['mtime'] = stat.st_mtime
+    _write_manifest(cache_dir, manifest)
+    return True
+
+
+def extract_table(con, name):
+    """Read a whole table from an open SQLite connection with typed columns."""
+    return typed(pd.read_sql_query('SELECT * FROM "{}"'.format(name), con), name)
+
+
+def _fitting(values, dtype):
+    """The narrowest integer dtype from ``dtype`` up that holds all ``values``."""
+    lowest, highest = values.min(), values.max()
+    if pd.isna(lowest):
+        return dtype
+    for candidate in INTEGERS[INTEGERS.index(dtype):]:
+        bounds = np.iinfo(candidate)
+        if bounds.min <= lowest and highest <= bounds.max:
+            return candidate
+    raise OverflowError('{} holds values outside int64: {}..{}'.format(values.name, lowest, highest))
+
+
+def typed(df, name):
+    """Give the columns of ``df`` (read from table ``name``) their ``SCHEMA`` dtypes.
+
+    Integer columns are widened where their values would not fit (``astype``
+    would silently wrap them).
+    """
+    for column, dtype in SCHEMA[name].items():
+        if column not in df or dtype == TEXT:
+            continue
+        if dtype == DATE:
+            df[column] = pd.to_datetime(df[column], format='%Y-%m-%d %H:%M:%S')
+            continue
+        if dtype.lower() in INTEGERS:
+            nullable = dtype[0] == 'I' or df[column].isna().any()
+            dtype = _fitting(df[column], dtype.lower())
+            if nullable:
+                dtype = dtype.capitalize()
+        df[column] = df[column].astype(dtype)
+    return df
+
+
+def build_cache(database=DATABASE, cache_dir=CACHE_DIR, force=False):
+    """Extract every table of ``database`` into Parquet unless already fresh."""
+    if not os.path.exists(database):
+        raise FileNotFoundError(database)
+    if not force and is_fresh(database, cache_dir):
+        return False
+    os.makedirs(cache_dir, exist_ok=True)
+    stat = os.stat(database)
+    con = sqlite3.connect(database)
+    table_sha1 = {}
+    try:
+        for name in TABLES:
+            path = table_path(name, cache_dir)
+            extract_table(con, name).to_parquet(path + '.tmp', index=False)
+            # extraction is deterministic: an unchanged table keeps its hash
+            table_sha1[name] = _file_hash(path + '.tmp')
+            os.replace(path + '.tmp', path)
+    finally:
+        con.close()
+    _write_manifest(cache_dir, {
+        'version': CACHE_VERSION,
+        'database': os.path.abspath(database),
+        'mtime': stat.st_mtime,
+        'size': stat.st_size,
+        'sha1': _file_hash(database),
+        'tables': TABLES,
+        'table_sha1': table_sha1,
+    })
+    return True
+
+
+def fingerprint(database=DATABASE, cache_dir=CACHE_DIR):
+    """Content hash of the database the (fresh) cache was extracted from."""
+    build_cache(database, cache_dir)
+    return '{}-{}'.format(CACHE_VERSION, _read_manifest(cache_dir)['sha1'])
+
+
+def table_fingerprints(database=DATABASE, cache_dir=CACHE_DIR):
+    """``{table: content hash}`` of every cached table, so a change to one table leaves the others' alone."""
+    build_cache(database, cache_dir)
+    return {name: '{}-{}'.format(CACHE_VERSION, sha1) for name, sha1 in _read_manifest(cache_dir)['table_sha1'].items()}
+
+
+def load_table(name, columns=None, database=DATABASE, cache_dir=CACHE_DIR):
+    """Load ``name`` from the cache, reading only ``columns`` if given."""
+    if name not in TABLES:
+        raise KeyError('unknown table: {}'.format(name))
+    build_cache(database, cache_dir)
+    return pd.read_parquet(table_path(name, cache_dir), columns=columns)
+
+
+def _derived_version(path):
+    """Code version a derived table was built with, or None if it is missing."""
+    if not os.path.exists(path) or not os.path.exists(path + '.version'):
+        return None
+    with open(path + '.version') as f:
+        return f.read()
+
+
+def load_derived(name, build, sources, database=DATABASE, cache_dir=CACHE_DIR):
+    """Load the table ``name`` computed by ``build()`` from cached ``sources``.
+
+    The result is persisted next to the cached tables, with the version of
+    the code ``build`` runs beside it: ``versions.code_version``, which
+    covers the builder and the package code it references, not the rest of
+    the modules it imports. It is rebuilt whenever one of the ``sources``
+    tables was re-extracted after it was written or that code changed.
+    """
+    build_cache(database, cache_dir)
+    path = table_path(name, cache_dir)
+    func = build
+    while isinstance(func, functools.partial):
+        # the bound database/cache paths say where, not what, is built
+        func = func.func
+    version = code_version(func)
+    if (_derived_version(path) != version
+            or any(os.path.getmtime(table_path(source, cache_dir)) > os.path.getmtime(path) for source in sources)):
+        build().to_parquet(path + '.tmp')
+        os.replace(path + '.tmp', path)
+        with open(path + '.version.tmp', 'w') as f:
+            f.write(version)
+        os.replace(path + '.version.tmp', path + '.version')
+    return pd.read_parquet(path)
@@ -0,0 +1,244 @@
+"""Synthetic databases with the schema of the Kaggle soccer dump.
+
+``generate`` writes ``Country``, ``League``, ``Team``, ``Player``,
+``Player_Attributes``, ``Team_Attributes`` and the 115-column ``Match``
+table to a new SQLite file. ``scale=1`` is about the size of the real data
+(11 leagues, 8 seasons, ~33k matches); the number of leagues, and with it
+teams, players and matches, grows linearly with ``scale``. Every league
+season is a double round robin scheduled one matchday per week, so
+standings, as-of joins and lineups behave as on the real data.
+"""
+import os
+import sqlite3
+
+import numpy as np
+import pandas as pd
+
+from soccer.events import XML_COLUMNS
+from soccer.odds import BOOKMAKERS, OUTCOMES
+from soccer.query import AWAY_PLAYER_COLUMNS, HOME_PLAYER_COLUMNS
+
+LEAGUES = ['Belgium Jupiler League', 'England Premier League', 'France Ligue 1', 'Germany 1. Bundesliga',
+           'Italy Serie A', 'Netherlands Eredivisie', 'Poland Ekstraklasa', 'Portugal Liga ZON Sagres',
+           'Scotland Premier League', 'Spain LIGA BBVA', 'Switzerland Super League']
+
+PLAYER_SKILLS = ['crossing', 'finishing', 'heading_accuracy', 'short_passing', 'volleys', 'dribbling', 'curve',
+                 'free_kick_accuracy', 'long_passing', 'ball_control', 'acceleration', 'sprint_speed', 'agility',
+                 'reactions', 'balance', 'shot_power', 'jumping', 'stamina', 'strength', 'long_shots',
+                 'aggression', 'interceptions', 'positioning', 'vision', 'penalties', 'marking',
+                 'standing_tackle', 'sliding_tackle', 'gk_diving', 'gk_handling', 'gk_kicking',
+                 'gk_positioning', 'gk_reflexes']
+
+# (numeric attribute, its class) in table order; None marks class-only columns
+TEAM_PLAY = [('buildUpPlaySpeed', 'buildUpPlaySpeedClass'),
+             ('buildUpPlayDribbling', 'buildUpPlayDribblingClass'),
+             ('buildUpPlayPassing', 'buildUpPlayPassingClass'),
+             (None, 'buildUpPlayPositioningClass'),
+             ('chanceCreationPassing', 'chanceCreationPassingClass'),
+             ('chanceCreationCrossing', 'chanceCreationCrossingClass'),
+             ('chanceCreationShooting', 'chanceCreationShootingClass'),
+             (None, 'chanceCreationPositioningClass'),
+             ('defencePressure', 'defencePressureClass'),
+             ('defenceAggression', 'defenceAggressionClass'),
+             ('defenceTeamWidth', 'defenceTeamWidthClass'),
+             (None, 'defenceDefenderLineClass')]
+
+TIMESTAMP = '%Y-%m-%d %H:%M:%S'
+
+
+def round_robin(teams):
+    """``(matchday, home, away)`` index arrays of a double round robin."""
+    if teams % 2:
+        raise ValueError('teams per league must be even')
+    order = np.arange(teams)
+    rounds = []
+    for day in range(teams - 1):
+        rotated = np.concatenate([order[:1], np.roll(order[1:], day)])
+        first, second = rotated[:teams // 2], rotated[::-1][:teams // 2]
+        home, away = (first, second) if day % 2 else (second, first)
+        rounds.append((np.full(teams // 2, day + 1), home, away))
+    matchday, home, away = (np.concatenate(parts) for parts in zip(*rounds))
+    return (np.concatenate([matchday, matchday + teams - 1]),
+            np.concatenate([home, away]), np.concatenate([away, home]))
+
+
+def _timestamps(values):
+    return pd.DatetimeIndex(values).strftime(TIMESTAMP)
+
+
+def _leagues(n_leagues):
+    names = LEAGUES[:n_leagues] + ['League {}'.format(i) for i in range(len(LEAGUES), n_leagues)]
+    ids = np.arange(n_leagues) * 1000 + 1
+    country = pd.DataFrame({'id': ids, 'name': [name.split(' ')[0] for name in names]})
+    league = pd.DataFrame({'id': ids, 'country_id': ids, 'name': names})
+    return country, league
+
+
+def _teams(n_teams):
+    ids = np.arange(n_teams)
+    return pd.DataFrame({'id': ids + 1, 'team_api_id': ids + 8000, 'team_fifa_api_id': ids + 1,
+                         'team_long_name': ['Team {}'.format(i) for i in ids],
+                         'team_short_name': ['T{:02d}'.format(i % 100) for i in ids]})
+
+
+def _players(n_players, rng):
+    ids = np.arange(n_players)
+    birthday = pd.Timestamp('1970-01-01') + pd.to_timedelta(rng.integers(0, 9000, n_players), unit='D')
+    return pd.DataFrame({'id': ids + 1, 'player_api_id': ids + 30000,
+                         'player_name': ['Player {}'.format(i) for i in ids],
+                         'player_fifa_api_id': ids + 1, 'birthday': _timestamps(birthday),
+                         'height': rng.normal(181.5, 6.5, n_players).round(2),
+                         'weight': rng.integers(117, 243, n_players)})
+
+
+def _player_attributes(player, snapshots, first_season, seasons, rng):
+    n = len(player) * snapshots
+    days = rng.integers(0, 365 * seasons, n)
+    overall = rng.normal(68, 7, n).clip(33, 94).round()
+    frame = pd.DataFrame({'id': np.arange(n) + 1,
+                          'player_fifa_api_id': np.repeat(player['player_fifa_api_id'].to_numpy(), snapshots),
+                          'player_api_id': np.repeat(player['player_api_id'].to_numpy(), snapshots),
+                          'date': _timestamps(pd.Timestamp('{}-02-22'.format(first_season))
+                                              + pd.to_timedelta(days, unit='D')),
+                          'overall_rating': overall,
+                          'potential': (overall + rng.integers(0, 10, n)).clip(None, 97),
+                          'preferred_foot': rng.choice(['right', 'left'], n, p=[0.75, 0.25]),
+                          'attacking_work_rate': rng.choice(['high', 'medium', 'low'], n),
+                          'defensive_work_rate': rng.choice(['high', 'medium', 'low'], n)})
+    for skill in PLAYER_SKILLS:
+        frame[skill] = rng.integers(10, 95, n).astype('float64')
+    return frame
+
+
+def _team_attributes(team, first_season, seasons, rng):
+    snapshots = max(1, seasons // 2)
+    n = len(team) * snapshots
+    frame = pd.DataFrame({'id': np.arange(n) + 1,
+                          'team_fifa_api_id': np.tile(team['team_fifa_api_id'].to_numpy(), snapshots),
+                          'team_api_id': np.tile(team['team_api_id'].to_numpy(), snapshots),
+                          'date': np.repeat(['{}-02-22 00:00:00'.format(first_season + 2 + 2 * k)
+                                             for k in range(snapshots)], len(team))})
+    for attribute, label in TEAM_PLAY:
+        if attribute is not None:
+            frame[attribute] = rng.integers(20, 80, n)
+            frame[label] = np.where(frame[attribute] < 34, 'Slow',
+                                    np.where(frame[attribute] < 67, 'Balanced', 'Fast'))
+        else:
+            frame[label] = rng.choice(['Organised', 'Free Form'], n, p=[0.9, 0.1])
+    return frame
+
+
+def _goal_xml(match_ids, team_ids, scorers, goals, rng):
+    """One ``<goal>`` document per match, a ``<value>`` per goal."""
+    minutes = rng.integers(1, 91, goals.sum())
+    documents = []
+    position = 0
+    for match_id, teams, players, count in zip(match_ids, team_ids, scorers, goals):
+        values = []
+        for side in range(2):
+            for _ in range(count[side]):
+                values.append('<value><comment>n</comment><elapsed>{}</elapsed><player1>{}</player1>'
+                              '<team>{}</team><id>{}</id><type>goal</type><goal_type>n</goal_type></value>'
+                              .format(minutes[position], players[side], teams[side], match_id * 10 + position % 10))
+                position += 1
+        documents.append('<goal>' + ''.join(values) + '</goal>')
+    return documents
+
+
+def _odds(n, rng):
+    """Decimal odds for every bookmaker around one fair price per match."""
+    fair = rng.dirichlet([4.5, 2.8, 3.2], n)
+    odds = {}
+    for bookmaker in BOOKMAKERS:
+        priced = rng.random(n) > 0.15
+        margin = rng.uniform(0.03, 0.1, n)
+        for position, outcome in enumerate(OUTCOMES):
+            price = (1.0 / (fair[:, position] * (1.0 + margin))).round(2)
+            odds[bookmaker + outcome] = np.where(priced, price.clip(1.01, None), np.nan)
+    return odds
+
+
+def _matches(league, team, player, players_per_team, teams_per_league, first_season, seasons, rng):
+    matchday, home, away = round_robin(teams_per_league)
+    per_season = len(matchday)
+    blocks = len(league) * seasons
+    n = blocks * per_season
+    league_index = np.repeat(np.repeat(np.arange(len(league)), seasons), per_season)
+    season_index = np.repeat(np.tile(np.arange(seasons), len(league)), per_season)
+    home_index = league_index * teams_per_league + np.tile(home, blocks)
+    away_index = league_index * teams_per_league + np.tile(away, blocks)
+    stage = np.tile(matchday, blocks)
+    kickoff = (pd.to_datetime(['{}-08-01'.format(first_season + s) for s in range(seasons)])[season_index]
+               + pd.to_timedelta(7 * (stage - 1) + rng.integers(0, 3, n), unit='D'))
+    team_ids = team['team_api_id'].to_numpy()
+    frame = pd.DataFrame({'id': np.arange(n) + 1,
+                          'country_id': league['country_id'].to_numpy()[league_index],
+                          'league_id': league['id'].to_numpy()[league_index],
+                          'season': np.array(['{}/{}'.format(first_season + s, first_season + s + 1)
+                                              for s in range(seasons)])[season_index],
+                          'stage': stage,
+                          'date': _timestamps(kickoff),
+                          'match_api_id': np.arange(n) + 400000,
+                          'home_team_api_id': team_ids[home_index],
+                          'away_team_api_id': team_ids[away_index],
+                          'home_team_goal': rng.poisson(1.55, n),
+                          'away_team_goal': rng.poisson(1.15, n)})
+    positions = {}
+    for axis in ('X', 'Y'):
+        for side in ('home', 'away'):
+            for i in range(1, 12):
+                positions['{}_player_{}{}'.format(side, axis, i)] = np.full(n, float(i if axis == 'Y' else 5))
+    player_ids = player['player_api_id'].to_numpy().astype('float64')
+    lineups = {}
+    for columns, index in ((HOME_PLAYER_COLUMNS, home_index), (AWAY_PLAYER_COLUMNS, away_index)):
+        # eleven distinct squad members per match, with some unknown slots
+        start = rng.integers(0, players_per_team, n)
+        for slot, column in enumerate(columns):
+            picked = player_ids[index * players_per_team + (start + slot) % players_per_team]
+            lineups[column] = np.where(rng.random(n) < 0.04, np.nan, picked)
+    frame = pd.concat([frame, pd.DataFrame(positions), pd.DataFrame(lineups)], axis=1)
+
+    scorers = np.stack([player_ids[home_index * players_per_team + rng.integers(0, players_per_team, n)],
+                        player_ids[away_index * players_per_team + rng.integers(0, players_per_team, n)]],
+                       axis=1).astype('int64')
+    goals = frame[['home_team_goal', 'away_team_goal']].to_numpy()
+    # only goal and possession events are generated; the other XML columns stay NULL
+    home_possession = rng.integers(30, 71, n)
+    documents = {
+        'goal': _goal_xml(frame['id'].to_numpy(), np.stack([team_ids[home_index], team_ids[away_index]], axis=1),
+                          scorers, goals, rng),
+        'possession': ['<possession><value><comment>{0}</comment><elapsed>90</elapsed><homepos>{0}</homepos>'
+                       '<awaypos>{1}</awaypos><type>special</type></value></possession>'.format(h, 100 - h)
+                       for h in home_possession],
+    }
+    for event in XML_COLUMNS:
+        frame[event] = documents.get(event)
+    return pd.concat([frame, pd.DataFrame(_odds(n, rng))], axis=1)
+
+
+def generate(path, scale=1.0, seasons=8, teams_per_league=20, players_per_team=25, snapshots=6,
+             first_season=2008, seed=0):
+    """Write a synthetic database to ``path`` (replacing it); returns its table sizes."""
+    rng = np.random.default_rng(seed)
+    n_leagues = max(1, int(round(len(LEAGUES) * scale)))
+    country, league = _leagues(n_leagues)
+    team = _teams(n_leagues * teams_per_league)
+    player = _players(len(team) * players_per_team, rng)
+    tables = {
+        'Country': country,
+        'League': league,
+        'Team': team,
+        'Player': player,
+        'Player_Attributes': _player_attributes(player, snapshots, first_season, seasons, rng),
+        'Team_Attributes': _team_attributes(team, first_season, seasons, rng),
+        'Match': _matches(league, team, player, players_per_team, teams_per_league, first_season, seasons, rng),
+    }
+    if os.path.exists(path):
+        os.remove(path)
+    con = sqlite3.connect(path)
+    try:
+        for name, frame in tables.items():
+            frame.to_sql(name, con, index=False, chunksize=50000)
+    finally:
+        con.close()
+    return {name: len(frame) for name, frame in tables.items()}
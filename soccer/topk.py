@@ -0,0 +1,44 @@
+"""Top-K selection without sorting whole tables.
+
+Every ranking in the package goes through ``top_k`` / ``both_ends``. Both
+accept a DataFrame or any iterable of DataFrame chunks (e.g. from
+``query.read_match(..., chunksize=...)``): each chunk is reduced to its own
+top ``n`` with ``nlargest``/``nsmallest`` and merged into a running
+candidate set, so the input never has to fit in memory at once. Ties keep
+input order, as with ``keep='first'``.
+"""
+import pandas as pd
+
+
+def _chunks(data):
+    return [data] if isinstance(data, pd.DataFrame) else data
+
+
+def _select(frame, columns, n, ascending):
+    if ascending:
+        return frame.nsmallest(n, columns)
+    return frame.nlargest(n, columns)
+
+
+def _merge(best, chunk, columns, n, ascending):
+    candidates = _select(chunk, columns, n, ascending)
+    if best is not None:
+        candidates = _select(pd.concat([best, candidates]), columns, n, ascending)
+    return candidates
+
+
+def top_k(data, columns, n=10, ascending=False):
+    """The ``n`` rows with the largest ``columns`` (smallest if ``ascending``)."""
+    best = None
+    for chunk in _chunks(data):
+        best = _merge(best, chunk, columns, n, ascending)
+    return best
+
+
+def both_ends(data, columns, n=10):
+    """``(smallest, largest)`` ``n`` rows of ``columns`` from one pass over ``data``."""
+    smallest = largest = None
+    for chunk in _chunks(data):
+        smallest = _merge(smallest, chunk, columns, n, True)
+        largest = _merge(largest, chunk, columns, n, False)
+    return smallest, largest
@@ -0,0 +1,177 @@
+"""Per-step measurements of a pipeline run, written as a structured trace.
+
+``measure`` runs one step and records its wall and CPU time, the rows of
+its DataFrame inputs and output, the output's ``memory_usage(deep=True)``,
+the Python allocations it made (``tracemalloc`` growth and peak) and the
+process's peak RSS afterwards. A ``Tracer`` collects those records, from
+this process or from pool workers, appends each one to a JSON lines file
+and can export the run as a Chrome trace (``chrome://tracing`` or
+Perfetto). ``compare`` lines two traces up by step name so runs can be
+diffed.
+"""
+import contextlib
+import json
+import os
+import sys
+import time
+import tracemalloc
+
+import pandas as pd
+
+try:
+    import resource
+except ImportError:  # not available on Windows; peak RSS is then left out
+    resource = None
+
+# ru_maxrss is in kilobytes on Linux and bytes on macOS
+_RSS_UNIT = 1 if sys.platform == 'darwin' else 1024
+
+
+def _rows(value):
+    return len(value) if isinstance(value, (pd.DataFrame, pd.Series)) else None
+
+
+def _bytes(value):
+    if isinstance(value, pd.DataFrame):
+        return int(value.memory_usage(deep=True).sum())
+    if isinstance(value, pd.Series):
+        return int(value.memory_usage(deep=True))
+    return None
+
+
+def _max_rss():
+    if resource is None:
+        return None
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * _RSS_UNIT
+
+
+class _Span:
+    """Measurements of one step; ``output`` may be set inside the ``with`` block."""
+
+    def __init__(self, name, inputs, memory):
+        self.name = name
+        self.inputs = inputs or {}
+        self.memory = memory
+        self.output = None
+        self.record = None
+
+    def __enter__(self):
+        self.started_tracing = self.memory and not tracemalloc.is_tracing()
+        if self.started_tracing:
+            tracemalloc.start()
+        if self.memory:
+            self.allocated = tracemalloc.get_traced_memory()[0]
+            tracemalloc.reset_peak()
+        self.start = time.time()
+        self.wall = time.perf_counter()
+        self.cpu = time.process_time()
+        return self
+
+    def __exit__(self, *exc):
+        wall = time.perf_counter() - self.wall
+        cpu = time.process_time() - self.cpu
+        rows_in = [_rows(value) for value in self.inputs.values()]
+        self.record = {
+            'name': self.name,
+            'pid': os.getpid(),
+            'start': self.start,
+            'wall': wall,
+            'cpu': cpu,
+            'rows_in': sum(rows for rows in rows_in if rows is not None),
+            'rows_out': _rows(self.output),
+            'bytes_out': _bytes(self.output),
+            'max_rss': _max_rss(),
+            'error': exc[0].__name__ if exc[0] else None,
+        }
+        if self.memory:
+            current, peak = tracemalloc.get_traced_memory()
+            self.record['alloc_delta'] = current - self.allocated
+            self.record['alloc_peak'] = peak - self.allocated
+            if self.started_tracing:
+                tracemalloc.stop()
+        return False
+
+
+def span(name, inputs=None, memory=True):
+    """Context manager measuring the step ``name``; its ``record`` is set on exit."""
+    return _Span(name, inputs, memory)
+
+
+def measure(name, func, inputs, memory=True):
+    """Call ``func(**inputs)``; returns ``(value, record)``."""
+    with span(name, inputs, memory) as step:
+        step.output = func(**inputs)
+    return step.output, step.record
+
+
+class Tracer:
+    """Collects step records and appends them to ``path`` as JSON lines.
+
+    ``memory`` turns on ``tracemalloc`` around every step, which slows the
+    steps down noticeably; the timings of a run without it are more
+    faithful.
+    """
+
+    def __init__(self, path=None, chrome_path=None, memory=True):
+        self.path = path
+        self.chrome_path = chrome_path
+        self.memory = memory
+        self.records = []
+        if path is not None:
+            open(path, 'w').close()
+
+    def add(self, record):
+        self.records.append(record)
+        if self.path is not None:
+            with open(self.path, 'a') as f:
+                f.write(json.dumps(record) + '\n')
+
+    @contextlib.contextmanager
+    def span(self, name, inputs=None):
+        """Measure the ``with`` block as the step ``name`` and record it."""
+        step = span(name, inputs, self.memory)
+        try:
+            with step:
+                yield step
+        finally:
+            self.add(step.record)
+
+    def measure(self, name, func, inputs):
+        value, record = measure(name, func, inputs, self.memory)
+        self.add(record)
+        return value
+
+    def frame(self):
+        return pd.DataFrame(self.records)
+
+    def chrome_trace(self):
+        """The records as Chrome trace events, one track per process."""
+        events = []
+        for record in self.records:
+            args = {key: value for key, value in record.items() if key not in ('name', 'pid', 'start', 'wall')}
+            events.append({'name': record['name'], 'cat': 'soccer', 'ph': 'X', 'pid': 0, 'tid': record['pid'],
+                           'ts': record['start'] * 1e6, 'dur': record['wall'] * 1e6, 'args': args})
+        return {'traceEvents': events, 'displayTimeUnit': 'ms'}
+
+    def close(self):
+        """Write the Chrome trace, if one was asked for."""
+        if self.chrome_path is not None:
+            with open(self.chrome_path, 'w') as f:
+                json.dump(self.chrome_trace(), f)
+
+
+def load_trace(path):
+    """A JSON lines trace as a DataFrame."""
+    return pd.read_json(path, lines=True)
+
+
+def compare(before, after, columns=('wall', 'cpu', 'rows_out', 'bytes_out', 'alloc_peak')):
+    """Two traces (paths or frames) side by side per step, with ``after / before`` ratios."""
+    before = load_trace(before) if isinstance(before, str) else before
+    after = load_trace(after) if isinstance(after, str) else after
+    columns = [column for column in columns if column in before and column in after]
+    merged = before.groupby('name')[columns].sum().join(after.groupby('name')[columns].sum(),
+                                                        how='outer', lsuffix='_before', rsuffix='_after')
+    for column in columns:
+        merged[column + '_ratio'] = (merged[column + '_after'] / merged[column + '_before']).round(3)
+    return merged.sort_values('wall_after', ascending=False)
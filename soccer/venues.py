@@ -0,0 +1,72 @@
+"""Home and away performance per team, league and season.
+
+Built on ``standings.team_results``: the stacked one-row-per-team-per-match
+frame is aggregated once by (league, season, team, venue) and unstacked into
+``home_*`` / ``away_*`` columns. Coarser levels (team over all seasons,
+league, season) sum those counts and recompute the rates, so wins are
+always credited to the side that actually won. Teams are keyed by
+``team_api_id``; the team rankings add names to the rows they return.
+"""
+from soccer.analysis import with_team_names
+from soccer.standings import team_results
+from soccer.topk import top_k
+
+VENUES = ['home', 'away']
+STATS = ['played', 'won', 'drawn', 'lost', 'goals_for', 'goals_against', 'points']
+RECORD_KEYS = ['league_name', 'season', 'team_api_id']
+
+
+def _rates(records):
+    """Add points per game at each venue and the home advantage in points per game."""
+    for venue in VENUES:
+        played = records[venue + '_played'].where(records[venue + '_played'] > 0)
+        records[venue + '_ppg'] = (records[venue + '_points'] / played).round(3)
+    records['home_advantage'] = (records['home_ppg'] - records['away_ppg']).round(3)
+    return records
+
+
+def venue_records(facts=None, results=None):
+    """Home and away W/D/L, goals and points per league, season and team."""
+    results = team_results(facts) if results is None else results
+    grouped = results.groupby(RECORD_KEYS + ['home'], observed=True, dropna=False)[STATS].sum()
+    wide = grouped.unstack('home', fill_value=0)
+    wide.columns = ['{}_{}'.format('home' if home else 'away', stat) for stat, home in wide.columns]
+    for venue in VENUES:
+        for stat in STATS:
+            if venue + '_' + stat not in wide:
+                wide[venue + '_' + stat] = 0
+    columns = [venue + '_' + stat for venue in VENUES for stat in STATS]
+    return _rates(wide[columns].reset_index())
+
+
+def home_away(by=('team_api_id',), records=None):
+    """``venue_records`` summed to the ``by`` level, e.g. ``['league_name']``."""
+    records = venue_records() if records is None else records
+    by = list(by)
+    columns = [venue + '_' + stat for venue in VENUES for stat in STATS]
+    totals = records.groupby(by, observed=True, dropna=False, as_index=False)[columns].sum()
+    return _rates(totals)
+
+
+def _venue_wins(venue, n, records, names):
+    totals = home_away(records=records)
+    wins = totals[['team_api_id', venue + '_won']].rename(columns={venue + '_won': venue + '_wins'})
+    wins = wins[wins[venue + '_wins'] > 0]
+    top = top_k(wins, venue + '_wins', len(wins) if n is None else n).reset_index(drop=True)
+    return with_team_names(top, names)
+
+
+def home_wins(n=None, records=None, names=None):
+    """Teams by number of home wins over all seasons."""
+    return _venue_wins('home', n, records, names)
+
+
+def away_wins(n=None, records=None, names=None):
+    """Teams by number of away wins over all seasons."""
+    return _venue_wins('away', n, records, names)
+
+
+def home_advantage(by=('league_name',), records=None):
+    """Home advantage in points per game at the ``by`` level, largest first."""
+    totals = home_away(by, records)
+    return top_k(totals, 'home_advantage', len(totals)).reset_index(drop=True)
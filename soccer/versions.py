@@ -0,0 +1,135 @@
+"""Content hashes of the code a function runs.
+
+A function's version covers its own source and, followed transitively, the
+source of every function and class of this package it references: through
+global names (including ``module.name`` attribute access), closure cells,
+default arguments and arguments bound by ``functools.partial``. The values
+of the plain constants (numbers, strings and containers of them) it reads
+are included too. Editing a function therefore changes the version of every
+function that can reach it, while editing an unrelated function, or a
+comment outside any function, changes nothing. Only the already loaded
+function objects are inspected; nothing is imported to hash them.
+"""
+import functools
+import hashlib
+import inspect
+import types
+
+_PACKAGE = __name__.split('.')[0]
+_SCALARS = (str, bytes, int, float, type(None))
+
+
+def _in_package(value):
+    module = getattr(value, '__module__', None) or ''
+    return module.split('.')[0] == _PACKAGE
+
+
+def _code_names(code):
+    """Global and attribute names used by ``code`` and the code nested in it."""
+    names = set(code.co_names)
+    for const in code.co_consts:
+        if isinstance(const, types.CodeType):
+            names |= _code_names(const)
+    return names
+
+
+def _source(value):
+    try:
+        return inspect.getsource(value)
+    except (OSError, TypeError):
+        # no source file (namedtuples, interactive code): what it is made of
+        if hasattr(value, '__code__'):
+            return value.__code__.co_code.hex()
+        return repr(getattr(value, '_fields', value.__qualname__))
+
+
+def _references(func):
+    """The values ``func`` can reach: globals it names, closure cells and defaults."""
+    names = sorted(_code_names(func.__code__))
+    namespace = func.__globals__
+    found = []
+    for name in names:
+        if name not in namespace:
+            continue
+        value = namespace[name]
+        if isinstance(value, types.ModuleType):
+            # `module.name`: the module's attributes this code names
+            if value.__name__.split('.')[0] == _PACKAGE:
+                found += [getattr(value, attribute) for attribute in names if hasattr(value, attribute)]
+        else:
+            found.append(value)
+    for cell in func.__closure__ or ():
+        try:
+            found.append(cell.cell_contents)
+        except ValueError:
+            pass
+    found += list(func.__defaults__ or ())
+    found += [value for _, value in sorted((func.__kwdefaults__ or {}).items())]
+    return found
+
+
+def _collect(value, seen, parts):
+    """Append to ``parts`` what ``value`` contributes to a version, following references."""
+    if isinstance(value, _SCALARS):
+        parts.append(repr(value))
+    elif isinstance(value, functools.partial):
+        _collect(value.func, seen, parts)
+        _collect(value.args, seen, parts)
+        _collect(sorted(value.keywords.items()), seen, parts)
+    elif isinstance(value, (list, tuple)):
+        for item in value:
+            _collect(item, seen, parts)
+    elif isinstance(value, (set, frozenset)):
+        for item in sorted(value, key=repr):
+            _collect(item, seen, parts)
+    elif isinstance(value, dict):
+        for key, item in value.items():
+            _collect(key, seen, parts)
+            _collect(item, seen, parts)
+    elif callable(value):
+        value = inspect.unwrap(value)
+        if not (inspect.isfunction(value) or inspect.isclass(value)) or not _in_package(value):
+            return
+        name = '{}.{}'.format(value.__module__, value.__qualname__)
+        if name in seen:
+            return
+        seen.add(name)
+        parts.append(name)
+        parts.append(_source(value))
+        if inspect.isclass(value):
+            for member in vars(value).values():
+                if inspect.isfunction(member):
+                    _collect(member, seen, parts)
+        else:
+            for reference in _references(value):
+                _collect(reference, seen, parts)
+    else:
+        # other objects (arrays, sentinels, ...): only their type is stable
+        parts.append(type(value).__qualname__)
+
+
+def code_version(func):
+    """Hash of the code ``func`` runs plus any arguments bound by ``functools.partial``."""
+    bound = []
+    while isinstance(func, functools.partial):
+        bound.append((func.args, sorted(func.keywords.items())))
+        func = func.func
+    func = inspect.unwrap(func)
+    name = '{}.{}'.format(getattr(func, '__module__', None) or '', getattr(func, '__qualname__', repr(func)))
+    parts = [name]
+    if _in_package(func):
+        _collect(func, set(), parts)
+    else:
+        # code outside this package (scripts, notebooks): its own source, plus
+        # the package code it reaches
+        try:
+            parts.append(inspect.getsource(func))
+        except (OSError, TypeError):
+            pass
+        seen = set()
+        if inspect.isfunction(func):
+            for reference in _references(func):
+                if callable(reference):
+                    _collect(reference, seen, parts)
+    _collect(bound, set(), parts)
+    return hashlib.sha1('\n'.join(parts).encode()).hexdigest()